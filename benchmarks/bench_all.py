@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+"""
+Module: bench_all.py
+Times `all Place` in the console, building the whole list of strings
+before printing it as `do_all` used to, and streaming it, printed as a
+list, one object per line, or as a page of 100 objects, then with two
+attributes only, as text and as JSON lines, for stores of growing size.
+Reports the time to the first byte written, the total time and the
+memory allocated at the peak.
+
+Usage:
+    python3 benchmarks/bench_all.py [number_of_objects ...]
+"""
+import gc
+import io
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from console import HBNBCommand  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+class Sink(io.TextIOBase):
+    """ Discards what is written, noting when the first write happened """
+
+    def __init__(self):
+        self.first = None
+
+    def write(self, s):
+        if self.first is None and s:
+            self.first = time.perf_counter()
+        return len(s)
+
+
+def build_store(count):
+    """ Stores `count` Places in memory """
+    FileStorage._FileStorage__objects = {}
+    gc.collect()
+    for i in range(count):
+        place = Place()
+        place.name = "Place {}".format(i)
+        place.amenity_ids = ["wifi", "pool"]
+
+
+def list_all():
+    """ `all Place` as it was: the list of every string, then one print """
+    print([str(obj) for obj in FileStorage().all("Place").values()])
+
+
+def run(command):
+    """ Returns the time to the first byte and the total time """
+    sink = Sink()
+    start = time.perf_counter()
+    with redirect_stdout(sink):
+        command()
+    end = time.perf_counter()
+    return sink.first - start, end - start
+
+
+def peak(command):
+    """ Returns the bytes allocated at the peak of a command """
+    tracemalloc.start()
+    with redirect_stdout(Sink()):
+        command()
+    _, top = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return top
+
+
+def main():
+    """ Runs the benchmark """
+    counts = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    console = HBNBCommand()
+    commands = (
+        ("list (before)", list_all),
+        ("all Place", lambda: console.onecmd("all Place")),
+        ("format=lines", lambda: console.onecmd("all Place format=lines")),
+        ("limit=100", lambda: console.onecmd("all Place limit=100 "
+                                             "offset=5000")),
+        ("2 fields", lambda: console.onecmd(
+            "all Place name,price_by_night format=lines")),
+        ("2 fields json", lambda: console.onecmd(
+            "all Place name,price_by_night format=json")),
+        ("format=json", lambda: console.onecmd("all Place format=json")),
+    )
+    print("{:>10} {:>14} {:>12} {:>10} {:>10}".format(
+        "objects", "command", "first byte", "total", "peak"))
+    for count in counts:
+        build_store(count)
+        for name, command in commands:
+            first, total = run(command)
+            print("{:>10} {:>14} {:>10.1f}ms {:>8.0f}ms {:>8.1f}MB".format(
+                count, name, first * 1000, total * 1000,
+                peak(command) / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
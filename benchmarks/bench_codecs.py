@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""
+Module: bench_codecs.py
+Compares the snapshot codecs and compressions on a generated store: the
+size of the file, the time FileStorage.save() takes to write it and the
+time FileStorage.reload() takes to read it back.
+
+Usage:
+    python3 benchmarks/bench_codecs.py [number_of_objects]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.engine.serializers import CODECS, COMPRESSIONS  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def build_objects(count):
+    """ Creates `count` Places in the storage """
+    FileStorage._FileStorage__objects = {}
+    for i in range(count):
+        place = Place()
+        place.name = "Place {}".format(i)
+        place.city_id = "city-{}".format(i % 1000)
+        place.number_rooms = i % 5
+        place.price_by_night = i % 500
+        place.latitude = i / 1000
+        place.amenity_ids = []
+
+
+def time_codec(path, codec, compression):
+    """ Returns the file size and the seconds taken to save and reload """
+    FileStorage._FileStorage__file_path = path
+    storage = FileStorage(codec=codec, compression=compression)
+    start = time.perf_counter()
+    storage.compact()
+    saved = time.perf_counter() - start
+    objects = FileStorage._FileStorage__objects
+    FileStorage._FileStorage__objects = {}
+    start = time.perf_counter()
+    FileStorage().reload()
+    loaded = time.perf_counter() - start
+    FileStorage._FileStorage__objects = objects
+    return os.path.getsize(path), saved, loaded
+
+
+def main():
+    """ Runs the benchmark """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    build_objects(count)
+    scale = 1000000 / count
+    print("objects: {}".format(count))
+    print("{:8} {:12} {:>12} {:>12} {:>12}".format(
+        "codec", "compression", "bytes/object", "save s/M", "reload s/M"))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in CODECS:
+            for compression in ["none"] + list(COMPRESSIONS):
+                size, saved, loaded = time_codec(
+                    os.path.join(tmp, name + "." + compression), name,
+                    compression)
+                print("{:8} {:12} {:>12.1f} {:>12.2f} {:>12.2f}".format(
+                    name, compression, size / count, saved * scale,
+                    loaded * scale))
+
+
+if __name__ == '__main__':
+    main()
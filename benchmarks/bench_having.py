@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""
+Module: bench_having.py
+Times "places having every one of these amenities" filters, with a scan
+of every Place testing list membership and through FileStorage.having(),
+for stores of growing size. Each Place has 0 to 12 of 40 amenities,
+the first ones being the most common.
+
+Usage:
+    python3 benchmarks/bench_having.py [number_of_objects ...]
+"""
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+AMENITIES = ["amenity-{}".format(i) for i in range(40)]
+WEIGHTS = [1 / (i + 1) for i in range(40)]
+QUERIES = 20
+
+
+def build_store(count):
+    """ Stores `count` Places in memory with random amenities """
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__attr_indexes = {}
+    gc.collect()
+    rand = random.Random(0)
+    for _ in range(count):
+        place = Place()
+        place.amenity_ids = list(set(rand.choices(AMENITIES, WEIGHTS,
+                                                  k=rand.randint(0, 12))))
+
+
+def scan(storage, amenities):
+    """ Answers a filter by testing every Place """
+    return [key for key, place in storage.all(Place).items()
+            if all(amenity in place.amenity_ids for amenity in amenities)]
+
+
+def time_queries(queries, filters):
+    """ Returns the seconds taken per query """
+    start = time.perf_counter()
+    for amenities in filters:
+        queries(amenities)
+    return (time.perf_counter() - start) / len(filters)
+
+
+def main():
+    """ Runs the benchmark """
+    counts = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    rand = random.Random(1)
+    filters = [rand.sample(AMENITIES[:12], 3) for _ in range(QUERIES)]
+    print("{:>10} {:>8} {:>10} {:>12} {:>10}".format(
+        "objects", "found", "scan", "build index", "having"))
+    for count in counts:
+        build_store(count)
+        storage = FileStorage()
+        assert sorted(storage.having(Place, "amenity_ids", filters[0])) == \
+            sorted(scan(storage, filters[0]))
+        found = sum(len(storage.having(Place, "amenity_ids", amenities))
+                    for amenities in filters) // QUERIES
+        FileStorage._FileStorage__attr_indexes = {}
+        scanning = time_queries(lambda amenities: scan(storage, amenities),
+                                filters[:3])
+        start = time.perf_counter()
+        storage.having(Place, "amenity_ids", [])
+        build = time.perf_counter() - start
+        having = time_queries(
+            lambda amenities: storage.having(Place, "amenity_ids",
+                                             amenities), filters)
+        print("{:>10} {:>8} {:>8.1f}ms {:>10.0f}ms {:>8.3f}ms".format(
+            count, found, scanning * 1000, build * 1000, having * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""
+Module: bench_memory.py
+Measures the memory FileStorage.reload() uses to hold a generated store,
+and the time it takes, with the model classes and with their compact
+variants, with and without interning of ids and attribute names.
+
+Usage:
+    python3 benchmarks/bench_memory.py [number_of_objects]
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def build_store(path, count):
+    """ Writes `count` Places and Reviews to `path` and leaves the storage
+    empty """
+    FileStorage._FileStorage__file_path = path
+    FileStorage._FileStorage__objects = {}
+    for i in range(count // 2):
+        place = Place()
+        place.name = "Place {}".format(i)
+        place.city_id = "city-{:05}".format(i % 1000)
+        place.user_id = "user-{:05}".format(i % 5000)
+        place.number_rooms = i % 5
+        place.price_by_night = i % 500
+        place.latitude = i / 1000
+        place.longitude = -i / 1000
+        review = Review()
+        review.place_id = place.id
+        review.user_id = place.user_id
+        review.text = "Nice"
+    FileStorage().save()
+    FileStorage._FileStorage__objects = {}
+
+
+def measure(**options):
+    """ Returns the bytes held by the objects of a reloaded store and the
+    seconds the reload took """
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__by_class = {}
+    FileStorage._FileStorage__indexed = None
+    gc.collect()
+    start = time.perf_counter()
+    FileStorage(**options).reload()
+    elapsed = time.perf_counter() - start
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__by_class = {}
+    FileStorage._FileStorage__indexed = None
+    gc.collect()
+    tracemalloc.start()
+    FileStorage(**options).reload()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    FileStorage._FileStorage__objects = {}
+    return size, elapsed
+
+
+def main():
+    """ Runs the benchmark """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        build_store(os.path.join(tmp, "file.json"), count)
+        print("objects: {}".format(count))
+        for name, options in (
+                ("model classes", {"intern": False}),
+                ("+ interning", {}),
+                ("compact classes", {"compact": True, "intern": False}),
+                ("+ interning", {"compact": True})):
+            size, elapsed = measure(**options)
+            print("{:16} {:>8.1f} MB {:>8.1f} bytes/object {:>6.2f}s/M".format(
+                name, size / 1e6, size / count, elapsed * 1e6 / count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+"""
+Module: bench_near.py
+Times Place searches around a point, within 10 km and in a bounding box,
+with a scan of every Place and through FileStorage.near() and within(),
+for stores of growing size. Places are spread around 50 city centres.
+
+Usage:
+    python3 benchmarks/bench_near.py [number_of_objects ...]
+"""
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.engine.indexes import distance_km  # noqa: E402
+from models.place import Place  # noqa: E402
+
+RADIUS_KM = 10
+QUERIES = 20
+
+
+def build_store(count, centres):
+    """ Stores `count` Places in memory around the centres """
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__attr_indexes = {}
+    gc.collect()
+    rand = random.Random(0)
+    for _ in range(count):
+        lat, lng = rand.choice(centres)
+        place = Place()
+        place.latitude = lat + rand.gauss(0, 0.3)
+        place.longitude = lng + rand.gauss(0, 0.3)
+
+
+def scan_near(storage, lat, lng):
+    """ Answers a radius search by computing every distance """
+    found = []
+    for key, place in storage.all(Place).items():
+        distance = distance_km(lat, lng, place.latitude, place.longitude)
+        if distance <= RADIUS_KM:
+            found.append((distance, key))
+    return [key for _, key in sorted(found)]
+
+
+def scan_within(storage, lat, lng):
+    """ Answers a box search by testing every position """
+    return {key for key, place in storage.all(Place).items()
+            if lat - 0.1 <= place.latitude <= lat + 0.1 and
+            lng - 0.1 <= place.longitude <= lng + 0.1}
+
+
+def time_queries(queries, points):
+    """ Returns the seconds taken per query """
+    start = time.perf_counter()
+    for lat, lng in points:
+        queries(lat, lng)
+    return (time.perf_counter() - start) / len(points)
+
+
+def main():
+    """ Runs the benchmark """
+    counts = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    rand = random.Random(1)
+    centres = [(rand.uniform(-60, 60), rand.uniform(-180, 180))
+               for _ in range(50)]
+    points = [(lat + rand.gauss(0, 0.2), lng + rand.gauss(0, 0.2))
+              for lat, lng in rand.choices(centres, k=QUERIES)]
+    print("{:>10} {:>8} {:>11} {:>11} {:>12} {:>11} {:>11}".format(
+        "objects", "found", "scan near", "scan box", "build index",
+        "near", "within"))
+    for count in counts:
+        build_store(count, centres)
+        storage = FileStorage()
+        lat, lng = points[0]
+        assert list(storage.near(Place, lat, lng, RADIUS_KM)) == \
+            scan_near(storage, lat, lng)
+        assert set(storage.within(Place, lat - 0.1, lng - 0.1, lat + 0.1,
+                                  lng + 0.1)) == scan_within(storage, lat, lng)
+        found = sum(len(storage.near(Place, lat, lng, RADIUS_KM))
+                    for lat, lng in points) // QUERIES
+        FileStorage._FileStorage__attr_indexes = {}
+        near = time_queries(lambda lat, lng: scan_near(storage, lat, lng),
+                            points[:3])
+        box = time_queries(lambda lat, lng: scan_within(storage, lat, lng),
+                           points[:3])
+        start = time.perf_counter()
+        storage.near(Place, 0, 0, 1)
+        build = time.perf_counter() - start
+        indexed_near = time_queries(
+            lambda lat, lng: storage.near(Place, lat, lng, RADIUS_KM), points)
+        indexed_box = time_queries(
+            lambda lat, lng: storage.within(Place, lat - 0.1, lng - 0.1,
+                                            lat + 0.1, lng + 0.1), points)
+        print("{:>10} {:>8} {:>9.1f}ms {:>9.1f}ms {:>10.0f}ms {:>9.3f}ms "
+              "{:>9.3f}ms".format(count, found, near * 1000, box * 1000,
+                                  build * 1000, indexed_near * 1000,
+                                  indexed_box * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""
+Module: bench_order_by.py
+Times price queries on Places, the ten cheapest and a price range, with a
+scan and sort of every Place and through FileStorage.order_by(), for
+stores of growing size.
+
+Usage:
+    python3 benchmarks/bench_order_by.py [number_of_objects ...]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+QUERIES = 100
+
+
+def build_store(count):
+    """ Stores `count` Places in memory, priced from 0 to 999 """
+    FileStorage._FileStorage__objects = {}
+    rand = random.Random(0)
+    for _ in range(count):
+        Place().price_by_night = rand.randrange(1000)
+
+
+def scan(storage, low):
+    """ Answers both queries by sorting every Place """
+    places = sorted(storage.all(Place).items(),
+                    key=lambda item: (item[1].price_by_night, item[0]))
+    cheapest = dict(places[:10])
+    between = {key: obj for key, obj in places
+               if low <= obj.price_by_night <= low + 10}
+    return cheapest, between
+
+
+def indexed(storage, low):
+    """ Answers both queries through the sorted index """
+    return (storage.order_by(Place, "price_by_night", limit=10),
+            storage.order_by(Place, "price_by_night", low, low + 10))
+
+
+def time_queries(storage, query):
+    """ Returns the seconds taken per pair of queries """
+    start = time.perf_counter()
+    for i in range(QUERIES):
+        query(storage, i * 9)
+    return (time.perf_counter() - start) / QUERIES
+
+
+def main():
+    """ Runs the benchmark """
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    print("{:>10} {:>12} {:>12} {:>12}".format(
+        "objects", "scan+sort", "build index", "indexed"))
+    for count in counts:
+        build_store(count)
+        storage = FileStorage()
+        assert scan(storage, 500) == indexed(storage, 500)
+        FileStorage._FileStorage__attr_indexes = {}
+        sorting = time_queries(storage, scan)
+        start = time.perf_counter()
+        storage.order_by(Place, "price_by_night", limit=1)
+        build = time.perf_counter() - start
+        lookups = time_queries(storage, indexed)
+        print("{:>10} {:>10.3f}ms {:>10.2f}ms {:>10.3f}ms".format(
+            count, sorting * 1000, build * 1000, lookups * 1000))
+
+
+if __name__ == '__main__':
+    main()
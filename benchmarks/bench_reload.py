@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""
+Module: bench_reload.py
+Times FileStorage.reload() on a generated store. Timestamps are parsed
+lazily, so reload() alone parses none of them; the store is also timed
+with every timestamp read afterwards, once with the old
+`datetime.strptime()` parsing and once with `parse_datetime()`.
+
+Usage:
+    python3 benchmarks/bench_reload.py [number_of_objects]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import base_model  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def strptime(value):
+    """ The timestamp parsing used before parse_datetime() """
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f')
+
+
+def build_store(path, count):
+    """ Writes `count` Places to `path` and leaves the storage empty """
+    FileStorage._FileStorage__file_path = path
+    FileStorage._FileStorage__objects = {}
+    storage = FileStorage()
+    for i in range(count):
+        place = Place()
+        place.name = "Place {}".format(i)
+        place.price_by_night = i % 500
+    storage.save()
+    FileStorage._FileStorage__objects = {}
+
+
+def time_reload(read_timestamps=False):
+    """ Returns the seconds taken to reload the store """
+    FileStorage._FileStorage__objects = {}
+    storage = FileStorage()
+    start = time.perf_counter()
+    storage.reload()
+    if read_timestamps:
+        for obj in storage.all().values():
+            obj.created_at, obj.updated_at  # noqa  # pylint: disable=pointless-statement
+    elapsed = time.perf_counter() - start
+    FileStorage._FileStorage__objects = {}
+    return elapsed
+
+
+def main():
+    """ Runs the benchmark """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        build_store(os.path.join(tmp, "file.json"), count)
+        lazy = time_reload()
+        with patch.object(base_model, "parse_datetime", strptime):
+            before = time_reload(True)
+        after = time_reload(True)
+    scale = 1000000 / count
+    print("objects:                  {}".format(count))
+    print("reload only:              {:.2f}s per million".format(
+        lazy * scale))
+    print("+ timestamps, strptime:   {:.2f}s per million".format(
+        before * scale))
+    print("+ timestamps, isoformat:  {:.2f}s per million".format(
+        after * scale))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+"""
+Module: bench_search.py
+Times Review text searches, a substring scan of `str()` of every Review
+against FileStorage.search(), and the first search after reload(), which
+reads the index written next to the JSON file instead of building it,
+for stores of growing size.
+
+Usage:
+    python3 benchmarks/bench_search.py [number_of_objects ...]
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.review import Review  # noqa: E402
+
+QUERIES = ["quiet", "clean AND garden", "noisy OR dirty", "view AND pool"]
+WORDS = ("quiet clean garden noisy dirty view pool host friendly bright "
+         "small large close far cosy modern old street beach centre").split()
+
+
+def build_store(path, count):
+    """ Writes `count` Reviews of 20 to 40 words to `path` """
+    FileStorage._FileStorage__file_path = path
+    FileStorage._FileStorage__objects = {}
+    rand = random.Random(0)
+    vocabulary = WORDS + ["word{}".format(i) for i in range(5000)]
+    weights = [50] * len(WORDS) + [1] * 5000
+    for _ in range(count):
+        Review().text = " ".join(rand.choices(vocabulary, weights,
+                                              k=rand.randint(20, 40)))
+
+
+def scan(storage, query):
+    """ Answers a query by looking for the words in `str()` of every
+    Review, as one would with `all Review` """
+    groups = [group.split(" AND ") for group in query.split(" OR ")]
+    return [obj for obj in storage.all(Review).values()
+            if any(all(word in str(obj) for word in group)
+                   for group in groups)]
+
+
+def fresh_process():
+    """ Empties the storage as a newly started process would find it """
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__by_class = {}
+    FileStorage._FileStorage__indexed = None
+    gc.collect()
+
+
+def first_search(storage):
+    """ Returns the seconds taken by reload() and a first search """
+    fresh_process()
+    start = time.perf_counter()
+    storage.reload()
+    storage.search(Review, ("text",), "quiet")
+    return time.perf_counter() - start
+
+
+def main():
+    """ Runs the benchmark """
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    print("{:>10} {:>10} {:>10} {:>18} {:>18}".format(
+        "objects", "scan", "indexed", "reload+build+1st", "reload+read+1st"))
+    storage = FileStorage()
+    for count in counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "file.json")
+            build_store(path, count)
+            start = time.perf_counter()
+            for query in QUERIES:
+                scan(storage, query)
+            scanning = (time.perf_counter() - start) / len(QUERIES)
+            storage.search(Review, ("text",), "quiet")
+            start = time.perf_counter()
+            for query in QUERIES:
+                storage.search(Review, ("text",), query, 10)
+            indexed = (time.perf_counter() - start) / len(QUERIES)
+            storage.save()
+            saved = first_search(storage)
+            os.remove(path + ".text")
+            built = first_search(storage)
+        fresh_process()
+        print("{:>10} {:>8.1f}ms {:>8.3f}ms {:>16.0f}ms {:>16.0f}ms".format(
+            count, scanning * 1000, indexed * 1000, built * 1000,
+            saved * 1000))
+
+
+if __name__ == '__main__':
+    main()
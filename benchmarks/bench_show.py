@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""
+Module: bench_show.py
+Times a cold single-object lookup, as a one-shot `show` performs it:
+FileStorage.reload() followed by FileStorage.get(), with and without the
+id index, for stores of growing size.
+
+Usage:
+    python3 benchmarks/bench_show.py [number_of_objects ...]
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def build_store(path, count):
+    """ Writes `count` Places and their id index to `path` and returns the
+    id of the last one """
+    FileStorage._FileStorage__file_path = path
+    FileStorage._FileStorage__objects = {}
+    for i in range(count):
+        place = Place()
+        place.name = "Place {}".format(i)
+        place.price_by_night = i % 500
+    FileStorage(id_index=True).save()
+    return place.id
+
+
+def time_show(place_id, id_index):
+    """ Returns the seconds taken to reload and look up one object """
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__by_class = {}
+    FileStorage._FileStorage__indexed = None
+    gc.collect()
+    storage = FileStorage(id_index=id_index)
+    start = time.perf_counter()
+    storage.reload()
+    assert storage.get("Place", place_id) is not None
+    elapsed = time.perf_counter() - start
+    FileStorage._FileStorage__objects = {}
+    return elapsed
+
+
+def main():
+    """ Runs the benchmark """
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    print("{:>10} {:>14} {:>14}".format("objects", "full reload", "id index"))
+    for count in counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            place_id = build_store(os.path.join(tmp, "file.json"), count)
+            full = time_show(place_id, False)
+            indexed = time_show(place_id, True)
+        print("{:>10} {:>12.2f}ms {:>12.3f}ms".format(
+            count, full * 1000, indexed * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""
+Module: bench_where.py
+Times FileStorage.where() on Places, comparing every instance and through
+a declared index, for stores of growing size.
+
+Usage:
+    python3 benchmarks/bench_where.py [number_of_objects ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+QUERIES = 100
+
+
+def build_store(count):
+    """ Stores `count` Places in memory, with max_guest from 0 to 15 """
+    FileStorage._FileStorage__objects = {}
+    for i in range(count):
+        Place().max_guest = i % 16
+
+
+def time_queries(storage):
+    """ Returns the seconds taken per query, and the number of results """
+    found = 0
+    start = time.perf_counter()
+    for i in range(QUERIES):
+        found = len(storage.where(Place, "max_guest", i % 16))
+    return (time.perf_counter() - start) / QUERIES, found
+
+
+def main():
+    """ Runs the benchmark """
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    print("{:>10} {:>8} {:>12} {:>12} {:>12}".format(
+        "objects", "results", "scan", "build index", "indexed"))
+    for count in counts:
+        build_store(count)
+        storage = FileStorage()
+        scan, found = time_queries(storage)
+        start = time.perf_counter()
+        storage.add_index(Place, "max_guest")
+        storage.where(Place, "max_guest", 0)
+        build = time.perf_counter() - start
+        indexed, _ = time_queries(storage)
+        FileStorage._FileStorage__declared = {}
+        print("{:>10} {:>8} {:>10.3f}ms {:>10.2f}ms {:>10.3f}ms".format(
+            count, found, scan * 1000, build * 1000, indexed * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,8 +5,11 @@ This module defines the HBNBCommand class,
 a command-line interpreter for managing AirBnB objects.
 """
 import cmd
+import heapq
 import json
 import re
+import sys
+from datetime import datetime
 from models.base_model import BaseModel
 from models.user import User
 from models.state import State
@@ -15,6 +18,7 @@ from models.amenity import Amenity
 from models.place import Place
 from models.review import Review
 from models import storage
+from models.engine.indexes import read_attr
 
 
 def parse_attr_value(attr_value):
@@ -40,6 +44,132 @@ def parse_attr_value(attr_value):
                 return attr_value
 
 
+def json_value(value):
+    """json_value Converts what json cannot encode, as the timestamps
+
+    Args:
+        value: attribute value
+
+    Returns:
+        (str): the ISO format of a datetime, or the string of the value
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+# json.dumps() builds a new encoder when given `default`
+json_encoder = json.JSONEncoder(default=json_value)
+
+
+def format_object(obj, fields=None, fmt="lines"):
+    """format_object Formats an object, or some of its attributes only
+
+    Args:
+        obj (BaseModel): the object
+        fields (list): names of the attributes shown, or None for all;
+            attributes not set show the class default, or None
+        fmt (str): "json" for a JSON object, as `to_dict()` gives it,
+            otherwise `[<ClassName>] (<id>) <attributes>` as `str()` gives
+
+    Returns:
+        (str): the formatted object
+    """
+    if fields is None:
+        if fmt == "json":
+            return json_encoder.encode(obj.to_dict())
+        return str(obj)
+    # only the attributes asked for are read
+    values = dict(zip(fields, read_attr(obj, tuple(fields))))
+    if fmt == "json":
+        record = {"id": obj.id}
+        record.update(values)
+        record["__class__"] = obj.__class__.__name__
+        return json_encoder.encode(record)
+    return "[{}] ({}) {}".format(obj.__class__.__name__, obj.id, values)
+
+
+def print_objects(objects, fmt="list", fields=None):
+    """print_objects Prints objects as they are formatted, without holding
+    them all in memory
+
+    Args:
+        objects (iterable): the objects
+        fmt (str): "list" to print the list
+            `print([str(obj) for obj in objects])` would print, "lines"
+            for one object per line, "json" for one JSON object per line
+        fields (list): names of the attributes shown, or None for all
+    """
+    write = sys.stdout.write
+    if fmt != "list":
+        for obj in objects:
+            write(format_object(obj, fields, fmt) + "\n")
+        return
+    write("[")
+    separator = ""
+    for obj in objects:
+        write(separator + repr(format_object(obj, fields)))
+        separator = ", "
+    write("]\n")
+
+
+def parse_options(args, options, formats):
+    """parse_options Reads the attribute names and `<name>=<value>`
+    options given to a listing command, printing what is wrong if any
+
+    Args:
+        args (list): the arguments; those without "=" are attribute names,
+            separated by commas or spaces
+        options (dict): the options accepted, with their defaults, updated
+            with the values given; "format" is a string, the others are
+            numbers
+        formats (tuple): the formats accepted
+
+    Returns:
+        (list): the attribute names, or None for all; False if an argument
+            is invalid
+    """
+    fields = []
+    for arg in args:
+        if "=" not in arg:
+            fields.extend(name for name in arg.split(",") if name)
+            continue
+        name, _, value = arg.partition("=")
+        if name not in options:
+            print("** unknown option **")
+            return False
+        if name == "format":
+            if value not in formats:
+                print("** unknown format **")
+                return False
+            options[name] = value
+        elif not value.isdigit():
+            print("** invalid number **")
+            return False
+        else:
+            options[name] = int(value)
+    return list(dict.fromkeys(fields)) or None
+
+
+def page(objects, offset=0, limit=None):
+    """page Selects a page of objects, in the order of their keys, so that
+    consecutive pages neither skip nor repeat objects
+
+    Args:
+        objects (dict): the objects, by key
+        offset (int): number of objects skipped
+        limit (int): most objects returned, or None for all the others
+
+    Returns:
+        (iterator): the objects of the page
+    """
+    if limit is None:
+        keys = sorted(objects)[offset:]
+    else:
+        keys = heapq.nsmallest(offset + limit, objects)[offset:]
+    return (objects[key] for key in keys)
+
+
 class HBNBCommand(cmd.Cmd):
     """
     HBNBCommand class: Command-line interpreter for managing AirBnB objects.
@@ -63,6 +193,19 @@ class HBNBCommand(cmd.Cmd):
             based on class name and ID.
         do_all(self, line):
             Prints all string representations of instances based on class name.
+        do_children(self, line):
+            Prints the instances of a class referring to an instance.
+        do_where(self, line):
+            Prints the instances of a class whose attribute matches a value.
+        do_near(self, line):
+            Prints the instances of a class within a distance of a point.
+        do_within(self, line):
+            Prints the instances of a class in a bounding box.
+        do_search(self, line):
+            Prints the instances of a class whose text holds some words.
+        do_having(self, line):
+            Prints the instances of a class whose list attribute holds
+            some values.
 
     Usage:
         Execute this script to launch the AirBnB command-line interpreter.
@@ -114,12 +257,11 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
         model_id = args[1]
-        key = model_name + "." + model_id
-        all_objs = storage.all()
-        if key not in all_objs:
+        model_obj = storage.get(model_name, model_id)
+        if model_obj is None:
             print("** no instance found **")
             return
-        del all_objs[key]
+        storage.delete(model_obj)
         storage.save()
 
     def do_update(self, line):
@@ -142,9 +284,8 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
         model_id = args[1]
-        key = model_name + "." + model_id
-        all_objs = storage.all()
-        if key not in all_objs:
+        model_obj = storage.get(model_name, model_id)
+        if model_obj is None:
             print("** no instance found **")
             return
         if len(args) == 2:
@@ -153,7 +294,6 @@ class HBNBCommand(cmd.Cmd):
         if len(args) == 3:
             print("** value missing **")
             return
-        model_obj = all_objs[key]
         attr_name = args[2]
         attr_value = args[3]
         if attr_name in ['id', 'created_at', 'updated_at']:
@@ -180,7 +320,10 @@ class HBNBCommand(cmd.Cmd):
     def do_show(self, line):
         """Show instance based on class name and id
 
-            Usage: show <ClassName> <InstanceID>
+            Usage: show <ClassName> <InstanceID> [<attribute>[,...]]
+            [format=json]
+        Only the attributes listed are shown, if any; format=json prints
+        a JSON object.
         """
         args = line.split()
         if not args or not args[0]:
@@ -196,35 +339,210 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        _id = args[1]
-        key = class_name + "." + _id
-
-        if key not in storage.all():
+        options = {"format": "lines"}
+        fields = parse_options(args[2:], options, ("lines", "json"))
+        if fields is False:
+            return
+        obj = storage.get(class_name, args[1])
+        if obj is None:
             print('** no instance found **')
         else:
-            print(storage.all()[key])
+            print(format_object(obj, fields, options["format"]))
 
     def do_all(self, line):
         """Prints all string rep. of instances based on class name.
 
         Usage:
-            `all <ClassName>` or `all`
+            `all [<ClassName> [<attribute>[,...]]] [limit=<n>] [offset=<n>]
+            [format=lines|json]` or
+            `<ClassName>.all([<attribute>, ...] [, limit=<n>, ...])`
+        Only the attributes listed are shown, if any. With a limit or an
+        offset, instances are listed in id order. format=lines prints one
+        instance per line instead of a list, format=json one JSON object
+        per line.
         """
         args = line.split()
-
-        if args:
-            class_name = args[0]
+        class_name = None
+        if args and "=" not in args[0]:
+            class_name = args.pop(0)
             if class_name not in HBNBCommand.all_classes:
                 print("** class doesn't exist **")
                 return
-
-            instances = [
-                str(obj) for obj in storage.all().values()
-                if obj.__class__.__name__ == class_name]
-            print(instances)
+        options = {"limit": None, "offset": 0, "format": "list"}
+        fields = parse_options(args, options, ("list", "lines", "json"))
+        if fields is False:
+            return
+        objects = storage.all(class_name)
+        if options["limit"] is None and not options["offset"]:
+            objects = objects.values()
         else:
-            instances = [str(obj) for obj in storage.all().values()]
-            print(instances)
+            objects = page(objects, options["offset"], options["limit"])
+        print_objects(objects, options["format"], fields)
+
+    def do_children(self, line):
+        """Prints the instances of a class referring to an instance.
+
+        Usage:
+            `children <ClassName> <InstanceID> <ChildClassName>` or
+            `<ClassName>.children(<InstanceID>, <ChildClassName>)`
+        """
+        args = line.split()
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in HBNBCommand.all_classes:
+            print("** class doesn't exist **")
+            return
+        if len(args) < 2:
+            print("** instance id missing **")
+            return
+        if len(args) < 3:
+            print("** child class name missing **")
+            return
+        if args[2] not in HBNBCommand.all_classes:
+            print("** class doesn't exist **")
+            return
+        if storage.get(args[0], args[1]) is None:
+            print("** no instance found **")
+            return
+        try:
+            children = storage.children(args[0], args[1], args[2])
+        except ValueError:
+            print("** no relation found **")
+            return
+        print_objects(children.values())
+
+    def do_where(self, line):
+        """Prints the instances of a class whose attribute matches a value.
+
+        Usage:
+            `where <ClassName> <attribute_name> [==|!=] <attribute_value>`,
+            `where <ClassName> <attribute_name> in <value> [<value> ...]` or
+            `<ClassName>.where(<attribute_name>, [<operator>,] <value>)`
+        """
+        args = line.split()
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in HBNBCommand.all_classes:
+            print("** class doesn't exist **")
+            return
+        if len(args) < 2:
+            print("** attribute name missing **")
+            return
+        op = "=="
+        values = args[2:]
+        if values and values[0] in ("==", "!=", "in"):
+            op = values.pop(0)
+        if not values:
+            print("** value missing **")
+            return
+        values = [parse_attr_value(value) for value in values]
+        matching = storage.where(args[0], args[1],
+                                 values if op == "in" else values[0], op)
+        print_objects(matching.values())
+
+    def do_near(self, line):
+        """Prints the instances of a class within a distance of a point,
+        nearest first.
+
+        Usage:
+            `near <ClassName> <latitude> <longitude> <radius_km> [<limit>]`
+            or `<ClassName>.near(<latitude>, <longitude>, <radius_km>)`
+        """
+        args = line.split()
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in HBNBCommand.all_classes:
+            print("** class doesn't exist **")
+            return
+        if len(args) < 4:
+            print("** latitude, longitude or radius missing **")
+            return
+        try:
+            lat, lng, radius_km = (float(arg) for arg in args[1:4])
+            limit = int(args[4]) if len(args) > 4 else None
+        except ValueError:
+            print("** invalid number **")
+            return
+        places = storage.near(args[0], lat, lng, radius_km, limit)
+        print_objects(places.values())
+
+    def do_within(self, line):
+        """Prints the instances of a class in a bounding box.
+
+        Usage:
+            `within <ClassName> <south> <west> <north> <east>` or
+            `<ClassName>.within(<south>, <west>, <north>, <east>)`
+        """
+        args = line.split()
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in HBNBCommand.all_classes:
+            print("** class doesn't exist **")
+            return
+        if len(args) < 5:
+            print("** bounding box missing **")
+            return
+        try:
+            box = [float(arg) for arg in args[1:5]]
+        except ValueError:
+            print("** invalid number **")
+            return
+        places = storage.within(args[0], *box)
+        print_objects(places.values())
+
+    def do_search(self, line):
+        """Prints the instances of a class whose text holds some words,
+        those where the words appear most first. Words separated by OR
+        are alternatives; all the other words must appear.
+
+        Usage:
+            `search <ClassName> <word> [AND|OR <word> ...]` or
+            `<ClassName>.search("<word> [AND|OR <word> ...]")`
+        """
+        args = line.split(maxsplit=1)
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in HBNBCommand.all_classes:
+            print("** class doesn't exist **")
+            return
+        model = HBNBCommand.all_classes[args[0]]
+        if not hasattr(model, "search"):
+            print("** class has no text to search **")
+            return
+        if len(args) < 2:
+            print("** search words missing **")
+            return
+        print_objects(model.search(args[1]))
+
+    def do_having(self, line):
+        """Prints the instances of a class whose list attribute holds
+        every one of some values, e.g. the places having some amenities.
+
+        Usage:
+            `having <ClassName> <attribute_name> <value> [<value> ...]` or
+            `<ClassName>.having(<attribute_name>, <value> [, <value> ...])`
+        """
+        args = line.split()
+        if not args:
+            print("** class name missing **")
+            return
+        if args[0] not in HBNBCommand.all_classes:
+            print("** class doesn't exist **")
+            return
+        if len(args) < 2:
+            print("** attribute name missing **")
+            return
+        if len(args) < 3:
+            print("** value missing **")
+            return
+        values = [parse_attr_value(value) for value in args[2:]]
+        matching = storage.having(args[0], args[1], values)
+        print_objects(matching.values())
 
     def parseline(self, line):
         """parseline overiding parent method to allow more dynamic inputs
@@ -259,11 +577,13 @@ class HBNBCommand(cmd.Cmd):
             else:
                 pre = re.split(r",\s*", matches[0][2])
                 for item in pre:
+                    item = item.strip()
                     if bool(re.match(r'^("[^"]*"|\'[^\']*\')$', item)):
                         arguments += " " + item.replace("'", "").replace(
                             '"', "")
-                    else:
-                        cmd.Cmd.parseline(self, line)
+                    elif item:
+                        # unquoted ids and class names
+                        arguments += " " + item
             combined = (
                 method_name.strip()
                 + " " +
@@ -311,10 +631,11 @@ class HBNBCommand(cmd.Cmd):
         model_name = args[0]
         model_id = args[1]
         rest = args[2:]
-        while len(rest) > 0:
-            my_line = model_name + " " + model_id + " " + " ".join(rest)
-            self.do_update(my_line)
-            rest = rest[2:]
+        with storage.transaction():
+            while len(rest) > 0:
+                my_line = model_name + " " + model_id + " " + " ".join(rest)
+                self.do_update(my_line)
+                rest = rest[2:]
         return
 
     def do_count(self, line):
@@ -331,10 +652,7 @@ class HBNBCommand(cmd.Cmd):
                 print("** class doesn't exist **")
                 return
 
-            instances = [
-                str(obj) for obj in storage.all().values()
-                if obj.__class__.__name__ == class_name]
-            print(len(instances))
+            print(storage.count(class_name))
 
 
 if __name__ == '__main__':
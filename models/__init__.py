@@ -1,8 +1,52 @@
 #!/usr/bin/python3
 """
 Initialization Script: __init__.py
+
+Set HBNB_TYPE_STORAGE=sqlite to keep objects in the SQLite database at
+HBNB_SQLITE_PATH (default file.db) instead of file.json.
+
+For file.json, set HBNB_STORAGE_JOURNAL=1 to make the storage append
+changes to a journal instead of rewriting file.json on every save, and
+HBNB_STORAGE_FSYNC to "always" or a number of milliseconds to force saves
+to disk. With HBNB_STORAGE_LAZY=1 stored objects are only built when first
+looked up, and with HBNB_STORAGE_SHARDED=1 each class is kept in its own
+file under file.shards/. HBNB_STORAGE_CODEC=binary writes the compact
+binary format instead of JSON; either format is read back.
+HBNB_STORAGE_COMPRESSION=gzip, bz2 or lzma compresses the snapshots;
+compressed files are recognized when read. HBNB_STORAGE_ID_INDEX=1 keeps
+an id index next to file.json so a single object can be looked up without
+reading the whole file. HBNB_STORAGE_COMPACT=1 loads objects as compact
+instances keeping their attributes in slots, to save memory, and
+HBNB_STORAGE_INTERN=0 stops sharing the repeated id and name strings of
+the objects loaded.
+
+HBNB_STORAGE_INDEXES declares secondary indexes for `where` queries, as a
+comma separated list of <Class>.<attribute>, e.g. "Place.max_guest".
 """
+from os import getenv
 from models.engine.file_storage import FileStorage
+from models.engine.sqlite_storage import SQLiteStorage
 
-storage = FileStorage()
+if getenv("HBNB_TYPE_STORAGE") == "sqlite":
+    storage = SQLiteStorage(getenv("HBNB_SQLITE_PATH", "file.db"))
+else:
+    fsync = getenv("HBNB_STORAGE_FSYNC", "never")
+    storage = FileStorage(journal=getenv("HBNB_STORAGE_JOURNAL") == "1",
+                          fsync=int(fsync) if fsync.isdigit() else fsync,
+                          lazy=getenv("HBNB_STORAGE_LAZY") == "1",
+                          sharded=getenv("HBNB_STORAGE_SHARDED") == "1",
+                          codec=getenv("HBNB_STORAGE_CODEC", "json"),
+                          compression=getenv("HBNB_STORAGE_COMPRESSION"),
+                          id_index=getenv("HBNB_STORAGE_ID_INDEX") == "1",
+                          compact=getenv("HBNB_STORAGE_COMPACT") == "1",
+                          intern=getenv("HBNB_STORAGE_INTERN") != "0")
 storage.reload()
+for declared in getenv("HBNB_STORAGE_INDEXES", "").split(","):
+    declared = declared.strip()
+    if not declared:
+        continue
+    cls, _, attr = declared.partition(".")
+    if not cls or not attr:
+        raise ValueError("HBNB_STORAGE_INDEXES entry {!r} is not "
+                         "<Class>.<attribute>".format(declared))
+    storage.add_index(cls, attr)
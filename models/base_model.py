@@ -8,12 +8,66 @@ from datetime import datetime
 from models import storage
 
 
+def parse_datetime(value):
+    """ Parses a timestamp written by `datetime.isoformat()`.
+
+    Args:
+        value (str): ISO 8601 timestamp
+
+    Returns:
+        datetime: the parsed timestamp
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        # records written by older versions of the storage
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f')
+
+
+class Timestamp:
+    """
+    Timestamp
+
+    Descriptor for `created_at` and `updated_at`. Instances loaded from the
+    storage keep the raw ISO 8601 string in `__dict__` until the attribute
+    is first read, so objects whose timestamps are never used are never
+    parsed, and `to_dict()` writes such strings back unchanged.
+    """
+
+    def __set_name__(self, owner, name):
+        """ Records the attribute name the descriptor is bound to. """
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        """ Returns the timestamp, parsing the raw string on first access.
+        """
+        if obj is None:
+            return self
+        try:
+            value = obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+        if isinstance(value, str):
+            value = parse_datetime(value)
+            obj.__dict__[self.name] = value
+        return value
+
+    def __set__(self, obj, value):
+        """ Stores the timestamp in the instance `__dict__`. """
+        obj.__dict__[self.name] = value
+
+
 class BaseModel:
     """
     BaseModel
 
     BaseModel class represents the base model for all other classes.
+
+    Attribute writes made after an instance is added to the storage are
+    reported to it through `storage.mark_dirty()`.
     """
+    created_at = Timestamp()
+    updated_at = Timestamp()
 
     def __init__(self, *args, **kwargs):
         """ Initializes a new instance of the BaseModel class.
@@ -28,17 +82,22 @@ class BaseModel:
             self.updated_at = datetime.now()
             storage.new(self)
         else:
-            for key, value in kwargs.items():
-                if key == '__class__':
-                    continue
-                if key == 'created_at':
-                    setattr(self, 'created_at', datetime.strptime(
-                        value, '%Y-%m-%dT%H:%M:%S.%f'))
-                elif key == 'updated_at':
-                    setattr(self, 'updated_at', datetime.strptime(
-                        value, '%Y-%m-%dT%H:%M:%S.%f'))
-                else:
-                    setattr(self, key, value)
+            # written straight to __dict__: nothing to track before the
+            # instance reaches the storage, and timestamps stay strings
+            # until read (see Timestamp)
+            attrs = self.__dict__
+            attrs.update(kwargs)
+            attrs.pop('__class__', None)
+
+    def __setattr__(self, name, value):
+        """ Sets an attribute and marks the instance dirty in the storage.
+
+        Args:
+            name (str): attribute name
+            value: attribute value
+        """
+        super().__setattr__(name, value)
+        storage.mark_dirty(self, name)
 
     def __str__(self):
         """ Returns a user-friendly string representation of the BaseModel
@@ -47,6 +106,10 @@ class BaseModel:
         Returns:
             str: A string in the format '[<class name>] (<id>) <__dict__>'.
         """
+        attrs = self.__dict__
+        for key in ('created_at', 'updated_at'):
+            if isinstance(attrs.get(key), str):
+                attrs[key] = parse_datetime(attrs[key])
         return "[{}] ({}) {}".format(
             self.__class__.__name__, self.id,
             self.__dict__)
@@ -65,7 +128,8 @@ class BaseModel:
                 additional properties.
         """
         new_dict = self.__dict__.copy()
-        new_dict['created_at'] = self.created_at.isoformat()
-        new_dict['updated_at'] = self.updated_at.isoformat()
+        for key in ('created_at', 'updated_at'):
+            if not isinstance(new_dict[key], str):
+                new_dict[key] = new_dict[key].isoformat()
         new_dict['__class__'] = self.__class__.__name__
         return new_dict
@@ -0,0 +1,218 @@
+#!/usr/bin/python3
+"""
+Module: compact.py
+This module defines compact variants of the model classes, for stores
+holding many objects in memory.
+
+A compact class is a subclass of a model class, with the same name, whose
+known attributes, `id`, the timestamps and the attributes the model
+declares with a default, live in `__slots__` instead of a per-instance
+`__dict__`. Attributes the model does not declare, as `update` can set,
+go to an overflow dictionary created on first use.
+
+`to_dict()` and `str()` give the same attributes as for the model class;
+the known attributes come first, in declaration order, then the others
+in the order they were set.
+"""
+from models.base_model import BaseModel, Timestamp, parse_datetime
+from models import storage
+
+_compact = {}
+
+
+class SlotTimestamp(Timestamp):
+    """
+    SlotTimestamp
+
+    Timestamp descriptor of a compact class. The value, raw string or
+    datetime, is kept in a slot instead of the instance `__dict__`.
+    """
+
+    def __init__(self, name, slot):
+        """ Initializes the descriptor.
+
+        Args:
+            name (str): attribute name
+            slot (member_descriptor): the slot holding the value
+        """
+        self.name = name
+        self.slot = slot
+
+    def __get__(self, obj, objtype=None):
+        """ Returns the timestamp, parsing the raw string on first access.
+        """
+        if obj is None:
+            return self
+        try:
+            value = self.slot.__get__(obj, objtype)
+        except AttributeError:
+            raise AttributeError(self.name) from None
+        if isinstance(value, str):
+            value = parse_datetime(value)
+            self.slot.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        """ Stores the timestamp in its slot. """
+        self.slot.__set__(obj, value)
+
+
+class CompactModel:
+    """
+    CompactModel
+
+    Behaviour shared by the compact classes built by `compact_class()`.
+
+    Class Attributes:
+        _fields (tuple): `(name, slot)` of every known attribute, in order.
+        _slotted (frozenset): Names of the known attributes.
+        _defaults (dict): Defaults the model class declares.
+    """
+    __slots__ = ("_extra",)
+    _fields = ()
+    _slotted = frozenset()
+    _defaults = {}
+
+    def __init__(self, *args, **kwargs):
+        """ Initializes a new instance like the model class does.
+
+        Attributes:
+            arg (tuple): arguments
+            kwargs (dict): keywords arguments
+        """
+        object.__setattr__(self, "_extra", None)
+        if not kwargs:
+            super().__init__(*args)
+            return
+        setattr_ = object.__setattr__
+        slotted = self._slotted
+        for name, value in kwargs.items():
+            if name in slotted:
+                setattr_(self, name, value)
+            elif name != '__class__':
+                self.__set_extra(name, value)
+
+    def __setattr__(self, name, value):
+        """ Sets an attribute and marks the instance dirty in the storage.
+
+        Args:
+            name (str): attribute name
+            value: attribute value
+        """
+        if name in self._slotted or name == "_extra":
+            object.__setattr__(self, name, value)
+        else:
+            self.__set_extra(name, value)
+        storage.mark_dirty(self, name)
+
+    def __getattr__(self, name):
+        """ Returns an attribute that is not in a slot: one set in the
+        overflow dictionary, or the default the model class declares.
+
+        Args:
+            name (str): attribute name
+        """
+        if name != "_extra":
+            extra = self._extra
+            if extra is not None and name in extra:
+                return extra[name]
+            if name in self._defaults:
+                return self._defaults[name]
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            self.__class__.__name__, name))
+
+    def __delattr__(self, name):
+        """ Deletes an attribute from its slot or the overflow dictionary.
+
+        Args:
+            name (str): attribute name
+        """
+        if name in self._slotted:
+            object.__delattr__(self, name)
+        elif self._extra is not None and name in self._extra:
+            del self._extra[name]
+        else:
+            raise AttributeError(name)
+
+    def __set_extra(self, name, value):
+        """ Stores an attribute in the overflow dictionary. """
+        if self._extra is None:
+            object.__setattr__(self, "_extra", {})
+        self._extra[name] = value
+
+    def __values(self):
+        """ Returns the attributes set on the instance, as `__dict__`
+        would hold them for the model class. """
+        values = {}
+        for name, slot in self._fields:
+            try:
+                values[name] = slot.__get__(self)
+            except AttributeError:
+                pass
+        if self._extra:
+            values.update(self._extra)
+        return values
+
+    def __str__(self):
+        """ Returns a user-friendly string representation of the instance.
+
+        Returns:
+            str: A string in the format '[<class name>] (<id>) <attributes>'.
+        """
+        for key in ('created_at', 'updated_at'):
+            try:
+                getattr(self, key)
+            except AttributeError:
+                pass
+        return "[{}] ({}) {}".format(
+            self.__class__.__name__, self.id, self.__values())
+
+    def to_dict(self):
+        """ Converts the instance to a dictionary.
+
+        Returns:
+            dict: A dictionary containing all attributes and the class name.
+        """
+        new_dict = self.__values()
+        for key in ('created_at', 'updated_at'):
+            if not isinstance(new_dict[key], str):
+                new_dict[key] = new_dict[key].isoformat()
+        new_dict['__class__'] = self.__class__.__name__
+        return new_dict
+
+
+def compact_class(cls):
+    """ Returns the compact variant of a model class, building it once.
+
+    Args:
+        cls (type): a subclass of BaseModel
+
+    Returns:
+        type: the compact subclass, named as `cls`
+    """
+    if cls in _compact:
+        return _compact[cls]
+    defaults = {}
+    for klass in reversed(cls.__mro__):
+        if not issubclass(klass, BaseModel):
+            continue
+        for name, value in vars(klass).items():
+            if not name.startswith("_") and not callable(value) and \
+                    not isinstance(value, (Timestamp, classmethod,
+                                           staticmethod)):
+                defaults[name] = value
+    names = ["id", "created_at", "updated_at"] + list(defaults)
+    slots = ["id", "_created_at", "_updated_at"] + list(defaults)
+    compact = type(cls.__name__, (CompactModel, cls), {
+        "__slots__": tuple(slots),
+        "__doc__": cls.__doc__,
+        "__module__": __name__,
+        "_defaults": defaults,
+        "_slotted": frozenset(names),
+    })
+    for name in ("created_at", "updated_at"):
+        setattr(compact, name, SlotTimestamp(name, vars(compact)["_" + name]))
+    compact._fields = tuple((name, vars(compact)[slot])
+                            for name, slot in zip(names, slots))
+    _compact[cls] = compact
+    return compact
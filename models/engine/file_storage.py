@@ -3,8 +3,339 @@
 Module: file_storage.py
 This module defines the FileStorage class for managing storage of objects in
 a JSON file.
+
+In journal mode `save()` only appends the objects written or deleted since
+the last flush to `<file_path>.log`, one JSON record per line; `reload()`
+replays that log on top of the snapshot and `compact()` folds it back into a
+fresh snapshot.
+
+The JSON file is never truncated in place: it is written to a temporary
+file of its own next to the target and renamed over it, so a crash leaves
+either the old or the new file. The `fsync` policy decides whether the
+data is also forced to disk before the rename. Under a policy in
+milliseconds the writes held back are forced to disk once the interval
+ends, and at exit.
+
+In lazy mode `reload()` keeps each record as the raw dictionary read from
+the file and only builds the model instance when the key is first looked
+up; records that are never looked up are saved back as they were read.
+
+In sharded mode each class is kept in its own file, `<Class>.json`, in a
+`<file_path stem>.shards` directory next to the JSON file, listed by a
+`manifest.json` there. `save()` only rewrites the shards of the classes
+with changes, and a shard is only read when its class is first used.
+
+Snapshots and shards are written with the configured codec (see
+`models.engine.serializers`) and read with the codec named by their header.
+They can also be compressed with gzip, bz2 or lzma, picked by the
+`compression` option or the extension of the file path (`file.json.gz`).
+The journal and the manifest are never compressed.
+
+With `id_index` every uncompressed JSON snapshot gets an index,
+`<file_path>.idx`, mapping each key to the byte range of its record (see
+`models.engine.id_index`). `reload()` then reads nothing: `get()` decodes
+single records through the index, and the whole file is only parsed when
+every object is needed.
+
+`children()` and `where()` read foreign keys and the attributes declared
+with `add_index()` from in-memory hash indexes (see
+`models.engine.indexes`); other predicates compare every instance of the
+class. `order_by()` reads numeric attributes from sorted indexes,
+`near()` and `within()` read positions from a latitude and longitude grid,
+and `having()` reads list attributes from bitmap indexes.
+
+`search()` reads free text from inverted indexes. Outside sharded mode
+`compact()` writes them to `<file_path>.text`, with the size and mtime of
+the JSON file and journal they describe, so a later process reads them
+back instead of tokenizing every object, and keeps them written from then
+on.
 """
+import atexit
 import json
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
+from models.engine.serializers import get_codec, iter_json_items  # noqa
+from models.engine.serializers import compress, compression_for
+from models.engine.serializers import get_compression, iter_records
+from models.engine.id_index import IdIndex, stamp, write_id_index
+from models.engine.indexes import BitmapIndex, GeoIndex, HashIndex
+from models.engine.indexes import SortedIndex, TextIndex
+from models.engine.indexes import check_operator, foreign_keys, matches
+from models.engine.indexes import read_attr, read_text_indexes, relation
+from models.engine.indexes import write_text_indexes
+
+_classes = {}
+_compact_classes = {}
+# storages holding writes back from their fsync policy
+_unsynced = set()
+
+
+def file_mode(path):
+    """
+    Returns the permissions a rewrite of a file is given: those of the
+    file, or those a new file gets under the umask.
+
+    Args:
+        path (str): The file.
+
+    Returns:
+        int: The permission bits.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@atexit.register
+def _fsync_at_exit():
+    """
+    Forces to disk the writes the storages still hold back at exit.
+    """
+    for storage in list(_unsynced):
+        storage.fsync()
+
+
+def model_classes(compact=False):
+    """
+    Returns the model classes by name.
+
+    Args:
+        compact (bool): Return the compact variants of the classes (see
+            `models.compact`).
+
+    Returns:
+        dict: Maps class names to model classes.
+    """
+    if compact:
+        if not _compact_classes:
+            # pylint: disable=import-outside-toplevel
+            from models.compact import compact_class
+            _compact_classes.update({name: compact_class(cls) for name, cls
+                                     in model_classes().items()})
+        return _compact_classes
+    if not _classes:
+        # pylint: disable=import-outside-toplevel
+        from models.base_model import BaseModel
+        from models.user import User
+        from models.state import State
+        from models.city import City
+        from models.amenity import Amenity
+        from models.place import Place
+        from models.review import Review
+
+        _classes.update({
+            "BaseModel": BaseModel,
+            "User": User,
+            "State": State,
+            "City": City,
+            "Amenity": Amenity,
+            "Place": Place,
+            "Review": Review
+        })
+    return _classes
+
+
+def id_fields(classes):
+    """
+    Returns the names of the record fields holding ids: `id`, `__class__`
+    and the attributes the model classes declare ending in `_id` or `_ids`.
+
+    Args:
+        classes (dict): Maps class names to model classes.
+
+    Returns:
+        tuple: The field names.
+    """
+    fields = {"id", "__class__"}
+    for cls in classes.values():
+        for klass in cls.__mro__:
+            fields.update(name for name in vars(klass)
+                          if name.endswith(("_id", "_ids")))
+    return tuple(sorted(fields))
+
+
+def intern_record(record, fields, names=True):
+    """
+    Makes the strings records repeat share one object each: the ids and
+    class names in `fields`, including the ids listed in `_ids` fields,
+    and with `names` the attribute names. Interned ids are also shared with
+    the records that refer to them.
+
+    Args:
+        record (dict): A record as decoded.
+        fields (tuple): The fields holding ids, see `id_fields()`.
+        names (bool): Intern the attribute names too.
+
+    Returns:
+        dict: The record, or a copy of it when names were interned.
+    """
+    intern = sys.intern
+    if names:
+        record = dict(zip(map(intern, record), record.values()))
+    for name in fields:
+        value = record.get(name)
+        if type(value) is str:
+            record[name] = intern(value)
+        elif type(value) is list and value:
+            record[name] = [intern(item) if type(item) is str else item
+                            for item in value]
+    return record
+
+
+class StoredObjects(dict):
+    """
+    The dictionary of stored objects `FileStorage.all()` returns.
+
+    Keys set or removed in place, as `del storage.all()[key]` does, are
+    reported to the storage so that it keeps its per-class index, its
+    attribute indexes and its record of changes up to date, as `new()`
+    and `delete()` do.
+    """
+
+    def __init__(self, track, *args, **kwargs):
+        """
+        Initializes the dictionary.
+
+        Args:
+            track (callable): Called with the dictionary, the key and the
+                object set under it, or None when the key was removed.
+        """
+        super().__init__(*args, **kwargs)
+        self.__track = track
+
+    def __setitem__(self, key, value):
+        """
+        Stores an object under a key.
+        """
+        dict.__setitem__(self, key, value)
+        self.__track(self, key, value)
+
+    def __delitem__(self, key):
+        """
+        Removes a key.
+        """
+        dict.__delitem__(self, key)
+        self.__track(self, key, None)
+
+    def __ior__(self, other):
+        """
+        Stores the objects of another mapping, as `update()` does.
+        """
+        self.update(other)
+        return self
+
+    def pop(self, key, *default):
+        """
+        Removes a key and returns its object, or `default`.
+        """
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        """
+        Removes the last key stored and returns it with its object.
+        """
+        key = next(reversed(dict.keys(self)))
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        """
+        Returns the object stored under a key, storing `default` first if
+        there is none.
+        """
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        """
+        Stores the objects of a mapping or of `(key, object)` pairs.
+        """
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        """
+        Removes every key.
+        """
+        for key in list(dict.keys(self)):
+            del self[key]
+
+
+class LazyObjects(StoredObjects):
+    """
+    A dictionary of stored objects whose values may still be raw records.
+
+    A raw record is turned into a model instance, and cached in place, the
+    first time it is read through the mapping. Membership tests, `len()`
+    and key iteration never build instances.
+    """
+
+    def __init__(self, hydrate, track, *args, **kwargs):
+        """
+        Initializes the dictionary.
+
+        Args:
+            hydrate (callable): Builds the model instance of a raw record.
+            track (callable): See `StoredObjects`.
+        """
+        super().__init__(track, *args, **kwargs)
+        self.__hydrate = hydrate
+
+    def __getitem__(self, key):
+        """
+        Returns the object stored under a key, building it if needed.
+        """
+        value = dict.__getitem__(self, key)
+        if type(value) is dict:
+            value = self.__hydrate(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def __iter__(self):
+        """
+        Iterates over the keys. Defined so that `dict(objects)` goes
+        through `__getitem__` instead of copying the raw records.
+        """
+        return dict.__iter__(self)
+
+    def get(self, key, default=None):
+        """
+        Returns the object stored under a key, or `default`.
+        """
+        if key in self:
+            return self[key]
+        return default
+
+    def values(self):
+        """
+        Returns a list of every object, building the missing ones.
+        """
+        return [self[key] for key in dict.keys(self)]
+
+    def items(self):
+        """
+        Returns a list of `(key, object)` pairs, building the missing ones.
+        """
+        return [(key, self[key]) for key in dict.keys(self)]
+
+    def copy(self):
+        """
+        Returns a plain dictionary of every object.
+        """
+        return dict(self.items())
 
 
 class FileStorage:
@@ -14,18 +345,364 @@ class FileStorage:
     Attributes:
         __file_path (str): The file path to the JSON file.
         __objects (dict): A dictionary to store objects.
+        __by_class (dict): Maps a class name to the set of keys of
+            `__objects` holding instances of that class.
+        __indexed (dict): The `__objects` dictionary `__by_class` was built
+            from, used to notice when `__objects` has been replaced.
+        __dirty (dict): Maps the keys written since the last flush to the
+            set of attribute names that changed, or None when the whole
+            object is new.
+        __deleted (set): Keys deleted since the last flush.
+        __journal_entries (int): Number of records in the journal.
+        __rewrite_all (bool): Set when `__objects` was replaced, so the
+            next save rewrites everything instead of only the changes.
+        __unloaded (set): Names of the classes whose shard has not been
+            read yet.
+        __deferred (IdIndex): The index of the JSON file while it has not
+            been read, or None.
+        __removed (set): Keys deleted while the JSON file has not been
+            read, which must not come back when it is.
+        __attr_indexes (dict): Maps a class name to its built attribute
+            indexes, of the kinds `models.engine.indexes` defines, by
+            `(kind, attribute)`.
+            Indexes are built on first use and dropped by `reload()`.
+        __declared (dict): Maps a class name to the set of attributes
+            `add_index()` declared an index on.
+        __text_saved (set): `(class name, attributes)` of the text indexes
+            in the file `compact()` writes, or None until it is read.
     """
     __file_path = "file.json"
     __objects = {}
+    __by_class = {}
+    __indexed = None
+    __dirty = {}
+    __deleted = set()
+    __journal_entries = 0
+    __rewrite_all = False
+    __unloaded = set()
+    __deferred = None
+    __removed = set()
+    __attr_indexes = {}
+    __declared = {}
+    __text_saved = None
+
+    def __init__(self, journal=False, compact_after=1000, fsync="never",
+                 lazy=False, sharded=False, codec="json", compression=None,
+                 id_index=False, compact=False, intern=True):
+        """
+        Initializes the storage.
+
+        Args:
+            journal (bool): Append changes to a journal on `save()` instead
+                of rewriting the whole JSON file.
+            compact_after (int): Number of journal records after which
+                `save()` folds the journal back into the JSON file.
+            fsync (str or int): "never" leaves flushing to the OS, "always"
+                fsyncs every save, and a number of milliseconds fsyncs at
+                most once per interval: saves made within the interval of
+                the last fsync are forced to disk when it ends, by a timer,
+                or at exit.
+            lazy (bool): Keep reloaded records raw until they are looked up.
+            sharded (bool): Keep one file per class instead of one JSON
+                file. Cannot be combined with `journal`.
+            codec (str): The codec snapshots are written with, "json" or
+                "binary".
+            compression (str, optional): "gzip", "bz2", "lzma" or "none".
+                Defaults to the one implied by the file path's extension.
+            id_index (bool): Keep an id index next to uncompressed JSON
+                snapshots and read them through it until every object is
+                needed. Cannot be combined with `sharded`.
+            compact (bool): Build the objects read from the files as
+                compact instances, which keep their known attributes in
+                slots (see `models.compact`).
+            intern (bool): Share one string object between the equal ids,
+                class names and attribute names of the records read.
 
-    def all(self):
+        Raises:
+            ValueError: If `fsync` is not a valid policy, `codec` or
+                `compression` is unknown, or `sharded` is combined with
+                `journal` or `id_index`.
+        """
+        if fsync not in ("never", "always") and \
+                (not isinstance(fsync, int) or fsync < 0):
+            raise ValueError("fsync must be 'never', 'always' or a number "
+                             "of milliseconds")
+        if journal and sharded:
+            raise ValueError("journal and sharded cannot be combined")
+        if id_index and sharded:
+            raise ValueError("id_index and sharded cannot be combined")
+        self.__journal = journal
+        self.__compact_after = compact_after
+        self.__fsync = fsync
+        self.__synced_at = None
+        self.__unsynced = set()
+        self.__timer = None
+        self.__lock = threading.Lock()
+        self.__depth = 0
+        self.__pending = False
+        self.__lazy = lazy
+        self.__sharded = sharded
+        self.__codec = get_codec(codec)
+        # None is resolved from the file path when writing, as it can change
+        get_compression(compression)
+        self.__compression = compression
+        self.__id_index = id_index
+        self.__compact = compact
+        self.__intern = intern
+
+    def all(self, cls=None):
         """
         Retrieves all objects stored in the storage.
 
+        Args:
+            cls (type or str, optional): Only return instances of this class.
+                Looked up in the per-class index, so the cost is the size of
+                the result rather than the size of the storage.
+
+        Returns:
+            dict: A dictionary containing all objects, or a new dictionary
+                holding only the instances of `cls`. The dictionary of all
+                objects is the storage's own; keys set or removed in it are
+                stored or deleted as by `new()` and `delete()`.
+        """
+        if cls is None:
+            self.__sync()
+            self.__ensure()
+            return self.__objects
+        objects = self.__objects
+        return {key: objects[key] for key in self.__bucket(cls)}
+
+    def get(self, cls, id):
+        """
+        Retrieves one object.
+
+        Args:
+            cls (type or str): The class of the object, or its name.
+            id (str): The id of the object.
+
+        Returns:
+            BaseModel: The object, or None if it is not stored.
+        """
+        # pylint: disable=redefined-builtin
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        key = cls + "." + id
+        if FileStorage.__deferred is not None:
+            return self.__get_deferred(key)
+        self.__ensure((cls,))
+        return self.__objects.get(key)
+
+    def count(self, cls=None):
+        """
+        Counts the objects stored in the storage.
+
+        Args:
+            cls (type or str, optional): Only count instances of this class.
+
+        Returns:
+            int: The number of objects.
+        """
+        if cls is None:
+            self.__ensure()
+            return len(self.__objects)
+        return len(self.__bucket(cls))
+
+    def children(self, cls, id, child_cls):
+        """
+        Retrieves the instances of a class referring to one object through
+        the foreign key named after its class, e.g. the Reviews whose
+        `place_id` is the id of a Place. Answered from an index of the
+        foreign key, built on first use.
+
+        Args:
+            cls (type or str): The class of the object, or its name.
+            id (str): The id of the object.
+            child_cls (type or str): The referring class, or its name.
+
+        Returns:
+            dict: The referring objects, by key.
+
+        Raises:
+            ValueError: If `child_cls` has no foreign key to `cls`.
+        """
+        # pylint: disable=redefined-builtin
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if isinstance(child_cls, str):
+            child_cls = model_classes()[child_cls]
+        index = self.__index(child_cls.__name__, relation(cls, child_cls))
+        objects = self.__objects
+        return {key: objects[key] for key in index.lookup(id)}
+
+    def add_index(self, cls, attr):
+        """
+        Declares a secondary index on an attribute of a class, so that
+        `where()` answers predicates on it from the index instead of
+        comparing every instance. The index is built by the first such
+        query and kept up to date afterwards. Foreign keys are indexed
+        without being declared.
+
+        Args:
+            cls (type or str): The class, or its name.
+            attr (str): The attribute.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        FileStorage.__declared.setdefault(cls, set()).add(attr)
+
+    def where(self, cls, attr, value, op="=="):
+        """
+        Retrieves the instances of a class whose attribute satisfies a
+        predicate. Instances without the attribute are compared through
+        the class default, or None.
+
+        Args:
+            cls (type or str): The class, or its name.
+            attr (str): The attribute compared.
+            value: The value compared with, an iterable of values for "in".
+            op (str): "==", "!=" or "in".
+
+        Returns:
+            dict: The matching objects, by key.
+
+        Raises:
+            ValueError: If `op` is not supported.
+        """
+        check_operator(op)
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if op == "in":
+            value = list(value)
+        model = model_classes().get(cls)
+        built = FileStorage.__attr_indexes.get(cls, {})
+        if attr in FileStorage.__declared.get(cls, ()) or \
+                (HashIndex, attr) in built or \
+                (model is not None and attr in foreign_keys(model)):
+            keys = self.__index(cls, attr).select(op, value)
+        else:
+            keys = [key for key, found in self.__attr_values(cls, attr)
+                    if matches(found, op, value)]
+        objects = self.__objects
+        return {key: objects[key] for key in keys}
+
+    def order_by(self, cls, attr, low=None, high=None, limit=None,
+                 reverse=False):
+        """
+        Retrieves the instances of a class in the order of a numeric
+        attribute, optionally between two bounds and up to a number of
+        instances; `limit=1` gives the smallest value, or the largest with
+        `reverse`. Answered by bisection in a sorted index of the
+        attribute, built on first use. Instances whose value is not a
+        number are left out; those without the attribute have the class
+        default.
+
+        Args:
+            cls (type or str): The class, or its name.
+            attr (str): The attribute.
+            low (int or float, optional): The smallest value, included.
+            high (int or float, optional): The largest value, included.
+            limit (int, optional): The most instances to return.
+            reverse (bool): Start from the largest value.
+
+        Returns:
+            dict: The objects, by key, in order.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        keys = self.__index(cls, attr, SortedIndex).range(low, high, reverse)
+        objects = self.__objects
+        return {key: objects[key] for key in islice(keys, limit)}
+
+    def near(self, cls, lat, lng, radius_km, limit=None):
+        """
+        Retrieves the instances of a class whose `latitude` and
+        `longitude` are within a distance of a point, nearest first.
+        Answered from a grid index of the positions, built on first use.
+
+        Args:
+            cls (type or str): The class, or its name.
+            lat (float): The latitude of the point, in degrees.
+            lng (float): The longitude of the point, in degrees.
+            radius_km (float): The distance, in kilometres.
+            limit (int, optional): The most instances to return.
+
+        Returns:
+            dict: The objects, by key, nearest first.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        index = self.__index(cls, ("latitude", "longitude"), GeoIndex)
+        objects = self.__objects
+        return {key: objects[key]
+                for _, key in index.near(lat, lng, radius_km, limit)}
+
+    def within(self, cls, south, west, north, east):
+        """
+        Retrieves the instances of a class whose `latitude` and
+        `longitude` are in a bounding box, edges included. Answered from
+        the grid index `near()` uses.
+
+        Args:
+            cls (type or str): The class, or its name.
+            south (float): The smallest latitude, in degrees.
+            west (float): The westmost longitude, in degrees. A box
+                crossing the antimeridian has `west` greater than `east`.
+            north (float): The largest latitude, in degrees.
+            east (float): The eastmost longitude, in degrees.
+
+        Returns:
+            dict: The objects, by key.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        index = self.__index(cls, ("latitude", "longitude"), GeoIndex)
+        objects = self.__objects
+        return {key: objects[key]
+                for key, _ in index.within(south, west, north, east)}
+
+    def having(self, cls, attr, values):
+        """
+        Retrieves the instances of a class whose list attribute, as
+        `Place.amenity_ids`, holds every one of some values. Answered by
+        and-ing the bitsets of the values in a bitmap index of the
+        attribute, built on first use.
+
+        Args:
+            cls (type or str): The class, or its name.
+            attr (str): The list attribute.
+            values (iterable): The values; every instance holds none.
+
+        Returns:
+            dict: The matching objects, by key.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        keys = self.__index(cls, attr, BitmapIndex).having(values)
+        objects = self.__objects
+        return {key: objects[key] for key in keys}
+
+    def search(self, cls, attrs, query, limit=None):
+        """
+        Retrieves the instances of a class whose text attributes hold the
+        words of a query: words separated by OR are alternatives, and all
+        the other words must appear (see `models.engine.indexes`). The
+        instances where the words appear most often come first. Answered
+        from an inverted index of the attributes.
+
+        Args:
+            cls (type or str): The class, or its name.
+            attrs (tuple): The text attributes searched.
+            query (str): The words searched, e.g. "quiet OR calm".
+            limit (int, optional): The most instances to return.
+
         Returns:
-            dict: A dictionary containing all objects.
+            dict: The objects, by key, most relevant first.
         """
-        return self.__objects
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        index = self.__text_index(cls, tuple(attrs))
+        objects = self.__objects
+        return {key: objects[key] for _, key in index.search(query, limit)}
 
     def new(self, obj):
         """
@@ -34,45 +711,815 @@ class FileStorage:
         Args:
             obj (BaseModel): The object to be added.
         """
+        self.__sync()
+        key = obj.__class__.__name__ + "." + obj.id
+        objects = self.__objects
+        dict.__setitem__(objects, key, obj)
+        self.__track(objects, key, obj)
+
+    def mark_dirty(self, obj, attr=None):
+        """
+        Records that a stored object changed and must be written by the
+        next `save()`. Objects that are not in the storage are ignored.
+
+        Args:
+            obj (BaseModel): The object that changed.
+            attr (str, optional): The attribute that changed. Without it the
+                whole object is considered changed.
+        """
+        obj_id = getattr(obj, "id", None)
+        if obj_id is None:
+            return
+        key = obj.__class__.__name__ + "." + obj_id
+        if dict.get(self.__objects, key) is not obj:
+            return
+        dirty = self.__dirty
+        if attr is None:
+            dirty[key] = None
+        elif key not in dirty:
+            dirty[key] = {attr}
+        elif dirty[key] is not None:
+            dirty[key].add(attr)
+        indexes = FileStorage.__attr_indexes.get(obj.__class__.__name__)
+        if indexes:
+            for index in indexes.values():
+                if attr is None or attr == index.attr or \
+                        (type(index.attr) is tuple and attr in index.attr):
+                    index.add(key, read_attr(obj, index.attr,
+                                             isinstance(index, GeoIndex)))
+
+    def dirty(self):
+        """
+        Iterates over the changes made since the last flush.
+
+        Yields:
+            tuple: `(key, obj, attrs)` for every written object, where
+                `attrs` is the set of changed attribute names or None when
+                the whole object is new, then `(key, None, None)` for every
+                deleted object.
+        """
+        objects = self.__objects
+        for key, attrs in list(self.__dirty.items()):
+            obj = objects.get(key)
+            if obj is not None:
+                yield key, obj, attrs
+        for key in list(self.__deleted):
+            yield key, None, None
+
+    def clear_dirty(self, keys=None):
+        """
+        Forgets recorded changes once they have been flushed.
+
+        Args:
+            keys (iterable, optional): The keys to forget. Defaults to all.
+        """
+        if keys is None:
+            self.__dirty.clear()
+            self.__deleted.clear()
+            return
+        for key in keys:
+            self.__dirty.pop(key, None)
+            self.__deleted.discard(key)
+
+    def delete(self, obj):
+        """
+        Removes an object from the storage.
+
+        Args:
+            obj (BaseModel): The object to be removed.
+        """
+        self.__sync()
         key = obj.__class__.__name__ + "." + obj.id
-        self.__objects[key] = obj
+        objects = self.__objects
+        if dict.pop(objects, key, None) is not None:
+            self.__track(objects, key, None)
+
+    def __track(self, objects, key, obj):
+        """
+        Records that an object was stored or removed, by `new()`,
+        `delete()` or in place in the dictionary `all()` returns.
+
+        Args:
+            objects (StoredObjects): The dictionary changed.
+            key (str): The key of the object.
+            obj (BaseModel): The object stored, or None if it was removed.
+        """
+        if objects is not FileStorage.__indexed:
+            # a dictionary the storage no longer uses
+            return
+        cls_name = key.split(".", 1)[0]
+        indexes = FileStorage.__attr_indexes.get(cls_name, {}).values()
+        if obj is None:
+            FileStorage.__by_class.get(cls_name, set()).discard(key)
+            self.__dirty.pop(key, None)
+            self.__deleted.add(key)
+            if FileStorage.__deferred is not None:
+                FileStorage.__removed.add(key)
+            for index in indexes:
+                index.remove(key)
+            return
+        FileStorage.__by_class.setdefault(cls_name, set()).add(key)
+        self.__dirty[key] = None
+        self.__deleted.discard(key)
+        FileStorage.__removed.discard(key)
+        for index in indexes:
+            index.add(key, read_attr(obj, index.attr,
+                                     isinstance(index, GeoIndex)))
 
     def save(self):
         """
         Saves the objects in the storage to the JSON file.
+
+        In journal mode only the objects written or deleted since the last
+        flush are appended to the journal, until it grows past
+        `compact_after` records.
+
+        Inside `transaction()` the save is deferred until the outermost
+        block exits.
+        """
+        if self.__depth:
+            self.__pending = True
+            return
+        self.__sync()
+        if self.__sharded and not FileStorage.__rewrite_all:
+            self.__save_shards({key.split(".", 1)[0]
+                                for key, _, _ in self.dirty()})
+            return
+        if not self.__journal or FileStorage.__rewrite_all or \
+                self.__journal_entries >= self.__compact_after:
+            self.compact()
+            return
+        if self.__dirty or self.__deleted:
+            entries = 0
+            with open(self.__journal_path(), mode="a",
+                      encoding="utf-8") as f:
+                if f.tell() and self.__journal_torn():
+                    f.write("\n")
+                for key, obj, _ in self.dirty():
+                    f.write(json.dumps({"key": key,
+                                        "value": obj and obj.to_dict()}))
+                    f.write("\n")
+                    entries += 1
+                f.flush()
+                if self.__fsync_due(self.__journal_path()):
+                    os.fsync(f.fileno())
+            FileStorage.__journal_entries += entries
+        self.clear_dirty()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Defers `save()` until the block exits, so a batch of changes is
+        flushed once. Blocks can be nested; the flush happens when the
+        outermost one exits, even if it raised. Changes are not rolled back.
+
+        Usage:
+            with storage.transaction():
+                obj.save()
+        """
+        self.__depth += 1
+        try:
+            yield self
+        finally:
+            self.__depth -= 1
+            if not self.__depth and self.__pending:
+                self.__pending = False
+                self.save()
+
+    def compact(self):
+        """
+        Rewrites the JSON file from the objects in the storage and drops
+        the journal. In sharded mode every shard is rewritten.
+        """
+        self.__sync()
+        if not self.__sharded and not self.__text_built():
+            saved = self.__read_text_indexes()
+            for cls_name, attrs in saved:
+                self.__text_index(cls_name, attrs, saved)
+        FileStorage.__rewrite_all = False
+        if self.__sharded:
+            self.__save_shards(set(FileStorage.__by_class) |
+                               FileStorage.__unloaded)
+            return
+        self.__ensure()
+        spans = None
+        if self.__id_index and self.__codec.indexable and \
+                self.__compression_name() is None:
+            spans = []
+        self.__write_atomic(self.__file_path,
+                            lambda f: self.__write_snapshot(f, spans=spans))
+        if spans is None:
+            try:
+                os.remove(self.__id_index_path())
+            except FileNotFoundError:
+                pass
+        else:
+            data_stamp = stamp(self.__file_path)
+            self.__write_atomic(
+                self.__id_index_path(),
+                lambda f: write_id_index(f, spans, data_stamp))
+        try:
+            os.remove(self.__journal_path())
+        except FileNotFoundError:
+            pass
+        FileStorage.__journal_entries = 0
+        self.__write_text_indexes()
+        self.clear_dirty()
+
+    def __save_shards(self, names):
+        """
+        Rewrites the shards of some classes, then the manifest.
+
+        Args:
+            names (set): Names of the classes to rewrite.
         """
-        to_dump = {key: value.to_dict() for key, value in self.__objects.items()}
-        with open(self.__file_path, mode="w", encoding="utf-8") as f:
-            f.write(json.dumps(to_dump))
+        if not names:
+            return
+        # a shard is rewritten from memory, so it must be read first
+        self.__ensure(names)
+        shard_dir = self.__shard_dir()
+        os.makedirs(shard_dir, exist_ok=True)
+        by_class = FileStorage.__by_class
+        for name in names:
+            path = os.path.join(shard_dir, name + ".json")
+            keys = by_class.get(name)
+            if keys:
+                self.__write_atomic(
+                    path, lambda f, keys=keys: self.__write_snapshot(f, keys))
+            else:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        # shards not read yet are kept as they are
+        shards = sorted({name for name, keys in by_class.items() if keys} |
+                        FileStorage.__unloaded)
+        manifest = json.dumps({"shards": {name: name + ".json"
+                                          for name in shards}}).encode()
+        self.__write_atomic(os.path.join(shard_dir, "manifest.json"),
+                            lambda f: f.write(manifest))
+        self.clear_dirty()
+
+    def __shard_dir(self):
+        """
+        Returns the directory holding the shards.
+        """
+        return os.path.splitext(self.__file_path)[0] + ".shards"
+
+    def __ensure(self, names=None):
+        """
+        Reads the shards of some classes if they have not been read yet,
+        or the JSON file if `reload()` deferred it. Objects already in
+        memory win over those read from a file.
+
+        Args:
+            names (iterable, optional): Names of the classes. Defaults to
+                every class.
+        """
+        if FileStorage.__deferred is not None:
+            self.__load_deferred()
+        unloaded = FileStorage.__unloaded
+        if not unloaded:
+            return
+        names = set(unloaded) if names is None else unloaded & set(names)
+        for name in names:
+            unloaded.discard(name)
+            self.__load_file(os.path.join(self.__shard_dir(),
+                                          name + ".json"), overwrite=False)
+
+    def __write_atomic(self, path, write):
+        """
+        Writes a file through a temporary file renamed over it, fsyncing
+        it as the storage's fsync policy requires.
+
+        Args:
+            path (str): The file to write.
+            write (callable): Called with the temporary binary file.
+        """
+        # a name of its own, so concurrent writers do not share it
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(path) + ".", suffix=".tmp",
+            dir=os.path.dirname(path) or ".")
+        try:
+            with open(fd, mode="wb") as f:
+                os.chmod(tmp_path, file_mode(path))
+                write(f)
+                f.flush()
+                synced = self.__fsync_due(path)
+                if synced:
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        if synced:
+            self.__fsync_directory(path)
+
+    def fsync(self):
+        """
+        Forces to disk the writes the fsync policy held back. Called when
+        the interval of a policy in milliseconds ends, and at exit.
+        """
+        with self.__lock:
+            paths, self.__unsynced = self.__unsynced, set()
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+            _unsynced.discard(self)
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                # replaced or removed since: nothing left to force
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self.__fsync_directory(path)
+        if paths:
+            self.__synced_at = time.monotonic()
+
+    def __fsync_due(self, path):
+        """
+        Tells whether the write in progress must be fsynced under the
+        storage's fsync policy. A write held back is fsynced by `fsync()`
+        when the interval ends.
+
+        Args:
+            path (str): The file written.
+
+        Returns:
+            bool: True if the caller must fsync.
+        """
+        if self.__fsync == "never":
+            return False
+        now = time.monotonic()
+        if self.__fsync != "always" and self.__synced_at is not None and \
+                (now - self.__synced_at) * 1000 < self.__fsync:
+            with self.__lock:
+                self.__unsynced.add(path)
+                _unsynced.add(self)
+                if self.__timer is None:
+                    self.__timer = threading.Timer(
+                        self.__synced_at + self.__fsync / 1000 - now,
+                        self.fsync)
+                    self.__timer.daemon = True
+                    self.__timer.start()
+            return False
+        self.__synced_at = now
+        if self.__unsynced:
+            # the files held back are forced to disk with this one
+            self.fsync()
+        return True
+
+    @staticmethod
+    def __fsync_directory(path):
+        """
+        Fsyncs the directory holding a file so a rename into it is
+        durable. Platforms that cannot open directories are skipped.
+
+        Args:
+            path (str): The file renamed.
+        """
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def __get_deferred(self, key):
+        """
+        Looks an object up while the JSON file has not been read, reading
+        only its record through the id index.
+
+        Args:
+            key (str): The key of the object.
+
+        Returns:
+            BaseModel: The object, or None if it is not stored.
+        """
+        objects = self.__objects
+        obj = objects.get(key)
+        if obj is not None or key in FileStorage.__removed:
+            return obj
+        record = FileStorage.__deferred.get(key)
+        if record is None:
+            return None
+        obj = self.__hydrate(record)
+        dict.__setitem__(objects, key, obj)
+        FileStorage.__by_class.setdefault(key.split(".", 1)[0],
+                                          set()).add(key)
+        return obj
+
+    def __load_deferred(self):
+        """
+        Reads the JSON file whose reading `reload()` deferred.
+        """
+        FileStorage.__deferred.close()
+        FileStorage.__deferred = None
+        self.__load_file(self.__file_path, overwrite=False)
+        by_class = FileStorage.__by_class
+        for key in FileStorage.__removed:
+            if dict.pop(self.__objects, key, None) is not None:
+                by_class[key.split(".", 1)[0]].discard(key)
+        FileStorage.__removed = set()
+
+    def __compression_name(self):
+        """
+        Returns the compression snapshots are written with, or None.
+        """
+        if self.__compression is None:
+            return compression_for(self.__file_path)
+        return get_compression(self.__compression)
+
+    def __write_snapshot(self, f, keys=None, spans=None):
+        """
+        Writes the objects to a file with the storage's codec and
+        compression, serializing and compressing one object at a time
+        instead of building the whole document in memory.
+
+        Args:
+            f (file): A binary file opened for writing.
+            keys (iterable, optional): Only write these keys.
+            spans (list, optional): Receives the byte range of each record,
+                for codecs that can index their records.
+        """
+        objects = self.__objects
+        if keys is None:
+            items = dict.items(objects)
+        else:
+            items = ((key, dict.__getitem__(objects, key)) for key in keys)
+        out = compress(f, self.__compression_name())
+        # records never looked up in lazy mode are written back raw
+        records = ((key, value if type(value) is dict else value.to_dict())
+                   for key, value in items)
+        if spans is None:
+            self.__codec.write(out, records)
+        else:
+            self.__codec.write(out, records, spans)
+        if out is not f:
+            out.close()
 
     def reload(self):
         """
         Reloads objects from the JSON file into the storage.
+
+        In sharded mode only the manifest is read; each shard is read when
+        its class is first used.
         """
-        # pylint: disable=import-outside-toplevel
-        from models.base_model import BaseModel
-        from models.user import User
-        from models.state import State
-        from models.city import City
-        from models.amenity import Amenity
-        from models.place import Place
-        from models.review import Review
+        self.__sync()
+        FileStorage.__attr_indexes = {}
+        FileStorage.__text_saved = None
+        if self.__lazy and not isinstance(self.__objects, LazyObjects):
+            FileStorage.__objects = LazyObjects(self.__hydrate, self.__track,
+                                                self.__objects)
+            FileStorage.__indexed = FileStorage.__objects
+        if self.__sharded:
+            try:
+                with open(os.path.join(self.__shard_dir(), "manifest.json"),
+                          mode="r", encoding="utf-8") as f:
+                    FileStorage.__unloaded = set(json.load(f)["shards"])
+            except FileNotFoundError:
+                pass
+            return
+        if self.__id_index and not self.__objects and \
+                not os.path.exists(self.__journal_path()):
+            deferred = IdIndex.open(self.__id_index_path(), self.__file_path)
+            if deferred is not None:
+                if FileStorage.__deferred is not None:
+                    FileStorage.__deferred.close()
+                FileStorage.__deferred = deferred
+                FileStorage.__removed = set()
+                return
+        self.__load_file(self.__file_path)
+        self.__replay(model_classes(self.__compact))
 
-        cls_dicts = {
-            "BaseModel": BaseModel,
-            "User": User,
-            "State": State,
-            "City": City,
-            "Amenity": Amenity,
-            "Place": Place,
-            "Review": Review
-        }
+    def __load_file(self, path, overwrite=True):
+        """
+        Adds the objects of a JSON file to the storage.
+
+        Args:
+            path (str): The JSON file.
+            overwrite (bool): Replace objects already in memory.
+        """
+        cls_dicts = model_classes(self.__compact)
+        lazy = self.__lazy
+        by_class = FileStorage.__by_class
+        objects = self.__objects
+        fields = id_fields(cls_dicts) if self.__intern else None
+        # compact instances keep no attribute names
+        names = lazy or not self.__compact
         try:
-            with open(self.__file_path, mode="r", encoding="utf-8") as f:
-                data = json.loads(f.read())
-            for key, value in data.items():
-                self.__objects[key] = cls_dicts[value['__class__']](**value)
+            with open(path, mode="rb") as f:
+                # one record at a time, so its dict can go as soon as the
+                # instance is built
+                for key, value in iter_records(f):
+                    if not overwrite and key in objects:
+                        continue
+                    if fields is not None:
+                        value = intern_record(value, fields, names)
+                    cls_name = value['__class__']
+                    if lazy:
+                        dict.__setitem__(objects, key, value)
+                    else:
+                        dict.__setitem__(objects, key,
+                                         cls_dicts[cls_name](**value))
+                    by_class.setdefault(cls_name, set()).add(key)
         except FileNotFoundError:
             pass
-        except json.decoder.JSONDecodeError:
+        except ValueError:
+            # JSONDecodeError, or a damaged binary snapshot
             pass
+
+    def __hydrate(self, record):
+        """
+        Builds the model instance of a raw record.
+
+        Args:
+            record (dict): The record as read from the JSON file.
+
+        Returns:
+            BaseModel: The instance.
+        """
+        return model_classes(self.__compact)[record['__class__']](**record)
+
+    def __replay(self, cls_dicts):
+        """
+        Applies the journal on top of the objects loaded from the JSON file.
+
+        Args:
+            cls_dicts (dict): Maps class names to model classes.
+        """
+        lazy = self.__lazy
+        by_class = FileStorage.__by_class
+        fields = id_fields(cls_dicts) if self.__intern else None
+        names = lazy or not self.__compact
+        entries = 0
+        try:
+            with open(self.__journal_path(), mode="r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.decoder.JSONDecodeError:
+                        # a line torn by an interrupted append; the next
+                        # appends start on a line of their own
+                        continue
+                    entries += 1
+                    key, value = record["key"], record["value"]
+                    cls_name = key.split(".", 1)[0]
+                    if value is None:
+                        if dict.pop(self.__objects, key, None) is not None:
+                            by_class[cls_name].discard(key)
+                        continue
+                    if fields is not None:
+                        value = intern_record(value, fields, names)
+                    if lazy:
+                        dict.__setitem__(self.__objects, key, value)
+                    else:
+                        dict.__setitem__(self.__objects, key,
+                                         cls_dicts[cls_name](**value))
+                    by_class.setdefault(cls_name, set()).add(key)
+        except FileNotFoundError:
+            pass
+        FileStorage.__journal_entries = entries
+
+    def __journal_torn(self):
+        """
+        Tells whether the journal ends in the middle of a line, as an
+        append interrupted by a crash leaves it.
+        """
+        with open(self.__journal_path(), mode="rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def __journal_path(self):
+        """
+        Returns the path of the journal kept next to the JSON file.
+        """
+        return self.__file_path + ".log"
+
+    def __id_index_path(self):
+        """
+        Returns the path of the id index kept next to the JSON file.
+        """
+        return self.__file_path + ".idx"
+
+    def __text_index_path(self):
+        """
+        Returns the path of the text indexes kept next to the JSON file.
+        """
+        return self.__file_path + ".text"
+
+    def __text_stamps(self):
+        """
+        Returns what identifies the JSON file and journal as they are now.
+        """
+        journal = self.__journal_path()
+        return (stamp(self.__file_path),
+                stamp(journal) if os.path.exists(journal) else None)
+
+    def __read_text_indexes(self):
+        """
+        Reads the text indexes written next to the JSON file.
+
+        Returns:
+            dict: Maps `(class name, attributes)` to the state of the
+                index, or to None when the index no longer describes the
+                objects in memory and must be built again.
+        """
+        try:
+            with open(self.__text_index_path(), mode="rb") as f:
+                stamps, entries = read_text_indexes(f)
+            current = self.__text_stamps()
+        except (OSError, ValueError):
+            # missing, damaged, or no JSON file
+            FileStorage.__text_saved = set()
+            return {}
+        valid = stamps == current and not FileStorage.__rewrite_all
+        saved = {(cls_name, tuple(attrs)): state if valid else None
+                 for cls_name, attrs, state in entries}
+        FileStorage.__text_saved = set(saved)
+        return saved
+
+    def __text_built(self):
+        """
+        Tells whether every text index in the file `compact()` writes is
+        built, so the file need not be read.
+        """
+        if FileStorage.__text_saved is None:
+            return False
+        return all((TextIndex, attrs) in
+                   FileStorage.__attr_indexes.get(cls_name, ())
+                   for cls_name, attrs in FileStorage.__text_saved)
+
+    def __write_text_indexes(self):
+        """
+        Writes the built text indexes next to the JSON file, or removes
+        the file when there are none.
+        """
+        entries = [(cls_name, attr, index.state())
+                   for cls_name, indexes in FileStorage.__attr_indexes.items()
+                   for (kind, attr), index in indexes.items()
+                   if kind is TextIndex]
+        FileStorage.__text_saved = {(cls_name, attr)
+                                    for cls_name, attr, _ in entries}
+        if not entries:
+            try:
+                os.remove(self.__text_index_path())
+            except FileNotFoundError:
+                pass
+            return
+        stamps = self.__text_stamps()
+        self.__write_atomic(self.__text_index_path(),
+                            lambda f: write_text_indexes(f, stamps, entries))
+
+    def __text_index(self, cls_name, attrs, saved=None):
+        """
+        Returns the text index of attributes of a class. An index not
+        built yet is read from the file `compact()` wrote when it is still
+        valid, and brought up to date with the changes made since; it is
+        built from the instances otherwise.
+
+        Args:
+            cls_name (str): The name of the class.
+            attrs (tuple): The attributes.
+            saved (dict, optional): What `__read_text_indexes()` returned.
+
+        Returns:
+            TextIndex: The index.
+        """
+        self.__sync()
+        indexes = FileStorage.__attr_indexes.get(cls_name, {})
+        if (TextIndex, attrs) in indexes:
+            return indexes[TextIndex, attrs]
+        if saved is None and not self.__sharded:
+            saved = self.__read_text_indexes()
+        state = (saved or {}).get((cls_name, attrs))
+        if state is None:
+            return self.__index(cls_name, attrs, TextIndex)
+        keys = self.__bucket(cls_name)
+        index = TextIndex(attrs, state)
+        for key in [key for key in state[0] if key not in keys]:
+            index.remove(key)
+        dirty = self.__dirty
+        index.update(self.__attr_values(
+            cls_name, attrs,
+            [key for key in keys if key not in index or key in dirty]))
+        FileStorage.__attr_indexes.setdefault(cls_name, {})[
+            TextIndex, attrs] = index
+        return index
+
+    def __bucket(self, cls):
+        """
+        Returns the set of keys holding instances of a class.
+
+        Args:
+            cls (type or str): The class or its name.
+
+        Returns:
+            set: The keys of the instances of `cls`.
+        """
+        self.__sync()
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        self.__ensure((cls,))
+        return FileStorage.__by_class.get(cls, ())
+
+    def __index(self, cls_name, attr, kind=HashIndex):
+        """
+        Returns the index of an attribute of a class, building it from the
+        instances of the class if it has not been built yet. Records not
+        looked up yet in lazy mode are read without being built.
+
+        Args:
+            cls_name (str): The name of the class.
+            attr (str or tuple): The attribute, or attributes.
+            kind (type): HashIndex, SortedIndex, GeoIndex, TextIndex or
+                BitmapIndex.
+
+        Returns:
+            The index, of type `kind`.
+        """
+        self.__sync()
+        indexes = FileStorage.__attr_indexes.setdefault(cls_name, {})
+        if (kind, attr) not in indexes:
+            index = kind(attr)
+            # positions are only indexed when set, never at the default
+            index.update(self.__attr_values(cls_name, attr,
+                                            own=kind is GeoIndex))
+            indexes[kind, attr] = index
+        return indexes[kind, attr]
+
+    def __attr_values(self, cls_name, attr, keys=None, own=False):
+        """
+        Iterates over the values an attribute takes on the instances of a
+        class. Records not looked up yet in lazy mode are read without
+        being built.
+
+        Args:
+            cls_name (str): The name of the class.
+            attr (str or tuple): The attribute, or a tuple of attributes
+                whose values are read as a tuple.
+            keys (list, optional): Only read these instances.
+            own (bool): Read None instead of the class default when the
+                attribute is not set.
+
+        Yields:
+            tuple: `(key, value)` for every instance, the value being the
+                class default, or None, when the attribute is not set.
+        """
+        if isinstance(attr, tuple):
+            # the bucket is iterated in the same order for every attribute
+            columns = [self.__attr_values(cls_name, name, keys, own)
+                       for name in attr]
+            for row in zip(*columns):
+                yield row[0][0], tuple(value for _, value in row)
+            return
+        if keys is None:
+            keys = self.__bucket(cls_name)
+        default = getattr(model_classes().get(cls_name), attr, None)
+        objects = self.__objects
+        for key in keys:
+            obj = dict.__getitem__(objects, key)
+            if type(obj) is dict:
+                yield key, obj.get(attr) if own else obj.get(attr, default)
+            else:
+                value = getattr(obj, attr, None)
+                if own and value is default:
+                    value = None
+                yield key, value
+
+    def __sync(self):
+        """
+        Rebuilds the per-class index when `__objects` was replaced behind
+        the storage's back, keeping a copy of the new dictionary that
+        reports the changes made to it in place.
+        """
+        if FileStorage.__indexed is self.__objects:
+            return
+        if FileStorage.__indexed is not None:
+            # the files no longer describe what is in memory
+            FileStorage.__rewrite_all = True
+            FileStorage.__unloaded = set()
+            if FileStorage.__deferred is not None:
+                FileStorage.__deferred.close()
+                FileStorage.__deferred = None
+                FileStorage.__removed = set()
+        if not isinstance(self.__objects, StoredObjects):
+            FileStorage.__objects = StoredObjects(self.__track,
+                                                  self.__objects)
+        by_class = {}
+        for key in self.__objects:
+            by_class.setdefault(key.split(".", 1)[0], set()).add(key)
+        FileStorage.__by_class = by_class
+        FileStorage.__indexed = self.__objects
+        FileStorage.__attr_indexes = {}
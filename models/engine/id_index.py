@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""
+Module: id_index.py
+This module defines the id index FileStorage can keep next to a JSON
+snapshot, so one object can be read without parsing the whole file.
+
+The index is a hash table of fixed size slots, each holding the CRC-32 of a
+`Class.id` key and the byte range of its record in the snapshot. Both files
+are memory-mapped, so a lookup reads a few slots and decodes one record,
+whatever the size of the store. The index records the size and mtime of the
+snapshot it was built for and is ignored once they no longer match.
+"""
+import json
+import mmap
+import os
+import struct
+import zlib
+
+MAGIC = b"HBNBIDX\x01"
+HEADER = struct.Struct("<8sQqQ")
+SLOT = struct.Struct("<IQI")
+
+
+def stamp(path):
+    """ Returns what identifies the current version of a snapshot.
+
+    Args:
+        path (str): snapshot path
+
+    Returns:
+        tuple: `(size, mtime_ns)`
+    """
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def write_id_index(f, spans, data_stamp):
+    """ Writes the index of a snapshot.
+
+    Args:
+        f (file): binary file opened for writing
+        spans (list): `(key, offset, length)` of every record
+        data_stamp (tuple): `stamp()` of the snapshot
+    """
+    slots = 8
+    while slots < 2 * len(spans):
+        slots *= 2
+    mask = slots - 1
+    table = bytearray(slots * SLOT.size)
+    used = bytearray(slots)
+    pack_into = SLOT.pack_into
+    crc32 = zlib.crc32
+    for key, offset, length in spans:
+        digest = crc32(key.encode("utf-8"))
+        i = digest & mask
+        while used[i]:
+            i = (i + 1) & mask
+        used[i] = 1
+        pack_into(table, i * SLOT.size, digest, offset, length)
+    f.write(HEADER.pack(MAGIC, data_stamp[0], data_stamp[1], slots))
+    f.write(table)
+
+
+class IdIndex:
+    """
+    IdIndex
+
+    Looks up single records of a snapshot through its index.
+    """
+
+    def __init__(self, index_map, data_map, slots):
+        """ Initializes the index over mapped files, see `open()`.
+
+        Args:
+            index_map (mmap.mmap): the mapped index
+            data_map (mmap.mmap): the mapped snapshot
+            slots (int): number of slots in the index
+        """
+        self.__index = index_map
+        self.__data = data_map
+        self.__mask = slots - 1
+
+    @classmethod
+    def open(cls, index_path, data_path):
+        """ Maps an index and its snapshot.
+
+        Args:
+            index_path (str): index path
+            data_path (str): snapshot path
+
+        Returns:
+            IdIndex: the index, or None if either file is missing or the
+                index was not built for the snapshot as it is now
+        """
+        maps = []
+        try:
+            for path in (index_path, data_path):
+                with open(path, mode="rb") as f:
+                    maps.append(mmap.mmap(f.fileno(), 0,
+                                          access=mmap.ACCESS_READ))
+            magic, size, mtime_ns, slots = HEADER.unpack_from(maps[0])
+            if magic == MAGIC and (size, mtime_ns) == stamp(data_path) and \
+                    len(maps[0]) == HEADER.size + slots * SLOT.size:
+                return cls(maps[0], maps[1], slots)
+        except (OSError, ValueError, struct.error):
+            # missing, empty or truncated files
+            pass
+        for mapped in maps:
+            mapped.close()
+        return None
+
+    def get(self, key):
+        """ Reads the record of a key.
+
+        Args:
+            key (str): `Class.id` key
+
+        Returns:
+            dict: the record, or None if the snapshot does not hold the key
+        """
+        digest = zlib.crc32(key.encode("utf-8"))
+        mask = self.__mask
+        i = digest & mask
+        while True:
+            found, offset, length = SLOT.unpack_from(
+                self.__index, HEADER.size + i * SLOT.size)
+            if not length:
+                return None
+            if found == digest:
+                record = json.loads(self.__data[offset:offset + length])
+                # different keys can share a CRC-32
+                if "{}.{}".format(record.get("__class__"),
+                                  record.get("id")) == key:
+                    return record
+            i = (i + 1) & mask
+
+    def close(self):
+        """ Unmaps both files. """
+        self.__index.close()
+        self.__data.close()
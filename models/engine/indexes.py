@@ -0,0 +1,919 @@
+#!/usr/bin/python3
+"""
+Module: indexes.py
+This module defines the in-memory indexes the storage engines keep over
+attributes of the stored objects, and the relations between the models.
+
+Models refer to each other by id only: a City has a `state_id`, a Review a
+`place_id` and a `user_id`. Such an attribute, named after the class it
+refers to, is a foreign key, and the objects referring to an object
+through it are its children.
+
+Queries select the instances of a class by comparing one attribute with
+a value: equal to it ("=="), different from it ("!="), or equal to one of
+a list of values ("in"). Numeric attributes can also be read in order,
+between two bounds, latitude and longitude pairs by distance to a point
+or within a bounding box, free text by the words it contains, and lists
+of values, as `Place.amenity_ids`, by the values they hold.
+
+An index covers one attribute, or several when its `attr` is a tuple of
+attribute names; it is then given the tuple of their values.
+"""
+import heapq
+import marshal
+import math
+import re
+from bisect import bisect_left, bisect_right, insort
+
+EARTH_RADIUS_KM = 6371.0088
+TEXT_MAGIC = b"HBNBTXT\x01"
+WORD = re.compile(r"\w+")
+
+OPERATORS = ("==", "!=", "in")
+
+
+def check_operator(op):
+    """ Checks a query operator is supported.
+
+    Args:
+        op (str): the operator
+
+    Raises:
+        ValueError: If `op` is not one of `OPERATORS`.
+    """
+    if op not in OPERATORS:
+        raise ValueError("unknown operator {!r}, expected one of {}".format(
+            op, ", ".join(OPERATORS)))
+
+
+def is_number(value):
+    """ Tells whether a value can be ordered in a SortedIndex.
+
+    Args:
+        value: attribute value
+
+    Returns:
+        bool: True for ints and floats other than NaN
+    """
+    # pylint: disable=comparison-with-itself
+    return isinstance(value, (int, float)) and value == value
+
+
+def read_attr(obj, attr, own=False):
+    """ Reads the value an index covers from an instance.
+
+    Args:
+        obj (BaseModel): the instance
+        attr (str or tuple): attribute name, or tuple of names
+        own (bool): read None instead of the class default for the
+            attributes the instance never set
+
+    Returns:
+        the attribute, or the tuple of the attributes, None when unset
+    """
+    if isinstance(attr, tuple):
+        if own:
+            return tuple(read_attr(obj, name, True) for name in attr)
+        return tuple(getattr(obj, name, None) for name in attr)
+    value = getattr(obj, attr, None)
+    if own:
+        # the default the model class declares, shared by every instance;
+        # a compact class keeps it aside, its attribute being a slot
+        defaults = getattr(type(obj), "_defaults", None)
+        if value is (getattr(type(obj), attr, None) if defaults is None
+                     else defaults.get(attr)):
+            return None
+    return value
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """ Returns the great-circle distance between two points.
+
+    Args:
+        lat1, lng1 (float): first point, in degrees
+        lat2, lng2 (float): second point, in degrees
+
+    Returns:
+        float: the distance in kilometres
+    """
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + \
+        math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_box(lat, lng, radius_km):
+    """ Returns the bounding box of the points within a distance of a
+    point.
+
+    Args:
+        lat, lng (float): the point, in degrees
+        radius_km (float): the distance, in kilometres
+
+    Returns:
+        tuple: `(south, west, north, east)` in degrees; `west` is greater
+            than `east` when the box crosses the antimeridian
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    south = lat - math.degrees(angle)
+    north = lat + math.degrees(angle)
+    if south <= -90 or north >= 90:
+        # the circle holds a pole and every longitude
+        return max(south, -90), -180, min(north, 90), 180
+    spread = math.sin(angle) / math.cos(math.radians(lat))
+    if spread >= 1:
+        return south, -180, north, 180
+    dlng = math.degrees(math.asin(spread))
+    west, east = lng - dlng, lng + dlng
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return south, west, north, east
+
+
+def in_box(lat, lng, south, west, north, east):
+    """ Tells whether a point is in a bounding box, edges included.
+
+    Args:
+        lat, lng (float): the point, in degrees
+        south, west, north, east (float): the box, see `radius_box()`
+
+    Returns:
+        bool: True if the point is in the box
+    """
+    if not south <= lat <= north:
+        return False
+    if west <= east:
+        return west <= lng <= east
+    return lng >= west or lng <= east
+
+
+def tokenize(text):
+    """ Splits text into lower case words.
+
+    Args:
+        text (str): the text
+
+    Returns:
+        list: the words, in order, repeated as often as they appear
+    """
+    return WORD.findall(text.lower())
+
+
+def parse_query(query):
+    """ Parses a text search: words separated by OR form alternatives,
+    and the words of an alternative must all appear. The AND between
+    them can be written or left out.
+
+    Args:
+        query (str): e.g. "quiet AND clean OR garden"
+
+    Returns:
+        list: the alternatives, as tuples of distinct words
+    """
+    groups = [[]]
+    for word in query.split():
+        if word == "OR":
+            groups.append([])
+        elif word != "AND":
+            groups[-1].extend(tokenize(word))
+    return [tuple(dict.fromkeys(group)) for group in groups if group]
+
+
+def matches(value, op, operand):
+    """ Compares an attribute value with a query operand.
+
+    Args:
+        value: attribute value
+        op (str): one of `OPERATORS`
+        operand: the value compared with, a list of values for "in"
+
+    Returns:
+        bool: whether the value satisfies the predicate
+    """
+    if op == "==":
+        return value == operand
+    if op == "!=":
+        return value != operand
+    return any(value == item for item in operand)
+
+
+def foreign_keys(cls):
+    """ Returns the foreign keys a model class declares.
+
+    Args:
+        cls (type): model class
+
+    Returns:
+        tuple: the attribute names ending in `_id`
+    """
+    names = []
+    for klass in reversed(cls.__mro__):
+        names.extend(name for name in vars(klass)
+                     if name.endswith("_id") and name not in names)
+    return tuple(names)
+
+
+def numeric_fields(cls):
+    """ Returns the numeric attributes a model class declares.
+
+    Args:
+        cls (type): model class
+
+    Returns:
+        tuple: the attribute names whose default is an int or a float
+    """
+    names = []
+    for klass in reversed(cls.__mro__):
+        names.extend(name for name, value in vars(klass).items()
+                     if not name.startswith("_") and
+                     type(value) in (int, float) and name not in names)
+    return tuple(names)
+
+
+def relation(cls_name, child_cls):
+    """ Returns the attribute through which instances of a class refer to
+    instances of another.
+
+    Args:
+        cls_name (str): name of the class referred to
+        child_cls (type): the referring model class
+
+    Returns:
+        str: the foreign key, `<cls_name in lower case>_id`
+
+    Raises:
+        ValueError: If `child_cls` has no such foreign key.
+    """
+    attr = cls_name.lower() + "_id"
+    if attr not in foreign_keys(child_cls):
+        raise ValueError("{} does not refer to {}".format(
+            child_cls.__name__, cls_name))
+    return attr
+
+
+class HashIndex:
+    """
+    HashIndex
+
+    Maps the values one attribute takes on the instances of one class to
+    the keys of those instances. Values that cannot be hashed, as lists,
+    are kept aside and compared one by one.
+    """
+
+    def __init__(self, attr):
+        """ Initializes an empty index.
+
+        Args:
+            attr (str): indexed attribute
+        """
+        self.attr = attr
+        self.__keys = {}
+        self.__values = {}
+        self.__unhashable = set()
+
+    def __len__(self):
+        """ Returns the number of keys indexed. """
+        return len(self.__values)
+
+    def add(self, key, value):
+        """ Indexes a key under a value, replacing its previous value.
+
+        Args:
+            key (str): storage key
+            value: attribute value
+        """
+        self.remove(key)
+        self.__values[key] = value
+        try:
+            self.__keys.setdefault(value, set()).add(key)
+        except TypeError:
+            self.__unhashable.add(key)
+
+    def update(self, items):
+        """ Indexes keys under their values.
+
+        Args:
+            items (iterable): `(key, value)` pairs
+        """
+        for key, value in items:
+            self.add(key, value)
+
+    def remove(self, key):
+        """ Removes a key from the index, if it is there.
+
+        Args:
+            key (str): storage key
+        """
+        try:
+            value = self.__values.pop(key)
+        except KeyError:
+            return
+        if key in self.__unhashable:
+            self.__unhashable.discard(key)
+            return
+        keys = self.__keys[value]
+        keys.discard(key)
+        if not keys:
+            del self.__keys[value]
+
+    def lookup(self, value):
+        """ Returns the keys indexed under a value.
+
+        Args:
+            value: attribute value
+
+        Returns:
+            set: the keys, to be read only
+        """
+        try:
+            return self.__keys.get(value, set())
+        except TypeError:
+            values = self.__values
+            return {key for key in self.__unhashable if values[key] == value}
+
+    def select(self, op, operand):
+        """ Returns the keys whose value satisfies a predicate.
+
+        Args:
+            op (str): one of `OPERATORS`
+            operand: the value compared with, a list of values for "in"
+
+        Returns:
+            set: the keys, to be read only
+        """
+        if op == "==":
+            return self.lookup(operand)
+        if op == "!=":
+            return self.__values.keys() - self.lookup(operand)
+        keys = set()
+        for item in operand:
+            keys |= self.lookup(item)
+        return keys
+
+    def values(self):
+        """ Returns the distinct hashable values indexed. """
+        return self.__keys.keys()
+
+
+class _Above:
+    """ Compares greater than any key, to bound the entries of a value. """
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_ABOVE = _Above()
+
+
+class SortedIndex:
+    """
+    SortedIndex
+
+    Keeps the keys of the instances of one class sorted by the value of a
+    numeric attribute, ties broken by key, so ranges and the smallest or
+    largest values are found by bisection. Values that are not numbers
+    are left out.
+    """
+
+    def __init__(self, attr):
+        """ Initializes an empty index.
+
+        Args:
+            attr (str): indexed attribute
+        """
+        self.attr = attr
+        self.__entries = []
+        self.__values = {}
+
+    def __len__(self):
+        """ Returns the number of keys indexed. """
+        return len(self.__entries)
+
+    def add(self, key, value):
+        """ Indexes a key under a value, replacing its previous value.
+
+        Args:
+            key (str): storage key
+            value: attribute value, left out if it is not a number
+        """
+        self.remove(key)
+        if is_number(value):
+            self.__values[key] = value
+            insort(self.__entries, (value, key))
+
+    def update(self, items):
+        """ Indexes keys under their values, sorting once when the index
+        is empty.
+
+        Args:
+            items (iterable): `(key, value)` pairs
+        """
+        if self.__values:
+            for key, value in items:
+                self.add(key, value)
+            return
+        values = self.__values
+        for key, value in items:
+            if is_number(value):
+                values[key] = value
+            else:
+                values.pop(key, None)
+        self.__entries = sorted(zip(values.values(), values.keys()))
+
+    def remove(self, key):
+        """ Removes a key from the index, if it is there.
+
+        Args:
+            key (str): storage key
+        """
+        try:
+            value = self.__values.pop(key)
+        except KeyError:
+            return
+        entries = self.__entries
+        del entries[bisect_left(entries, (value, key))]
+
+    def range(self, low=None, high=None, reverse=False):
+        """ Iterates over the keys whose value is between two bounds.
+
+        Args:
+            low (int or float, optional): smallest value, included
+            high (int or float, optional): largest value, included
+            reverse (bool): start from the largest value
+
+        Yields:
+            str: the keys, by value
+        """
+        entries = self.__entries
+        start = 0 if low is None else bisect_left(entries, (low, ""))
+        stop = len(entries) if high is None else \
+            bisect_right(entries, (high, _ABOVE))
+        if reverse:
+            for i in range(stop - 1, start - 1, -1):
+                yield entries[i][1]
+        else:
+            for i in range(start, stop):
+                yield entries[i][1]
+
+
+class GeoIndex:
+    """
+    GeoIndex
+
+    Buckets the keys of the instances of one class by the cell of a
+    latitude and longitude grid their position falls in, so the points of
+    a box or a circle are found by reading the few cells it overlaps.
+    Positions that are not pairs of numbers in range, as those of the
+    instances that never set them, are left out.
+    """
+
+    def __init__(self, attr=("latitude", "longitude"), cell_size=0.1):
+        """ Initializes an empty index.
+
+        Args:
+            attr (tuple): latitude and longitude attribute names
+            cell_size (float): side of a grid cell, in degrees
+        """
+        self.attr = attr
+        self.__size = cell_size
+        self.__cells = {}
+        self.__points = {}
+
+    def __len__(self):
+        """ Returns the number of keys indexed. """
+        return len(self.__points)
+
+    def __cell(self, lat, lng):
+        """ Returns the grid cell of a point. """
+        return (math.floor((lat + 90) / self.__size),
+                math.floor((lng + 180) / self.__size))
+
+    def add(self, key, value):
+        """ Indexes a key at a position, replacing its previous one.
+
+        Args:
+            key (str): storage key
+            value (tuple): `(latitude, longitude)`, in degrees
+        """
+        self.remove(key)
+        try:
+            lat, lng = value
+        except (TypeError, ValueError):
+            return
+        if is_number(lat) and is_number(lng) and \
+                -90 <= lat <= 90 and -180 <= lng <= 180:
+            self.__points[key] = (lat, lng)
+            self.__cells.setdefault(self.__cell(lat, lng), set()).add(key)
+
+    def update(self, items):
+        """ Indexes keys at their positions, filling the grid in one pass
+        when the index is empty.
+
+        Args:
+            items (iterable): `(key, (latitude, longitude))` pairs
+        """
+        if self.__points:
+            for key, value in items:
+                self.add(key, value)
+            return
+        points = self.__points
+        for key, value in items:
+            try:
+                lat, lng = value
+            except (TypeError, ValueError):
+                points.pop(key, None)
+                continue
+            if is_number(lat) and is_number(lng) and \
+                    -90 <= lat <= 90 and -180 <= lng <= 180:
+                points[key] = (lat, lng)
+            else:
+                points.pop(key, None)
+        cells = self.__cells
+        size = self.__size
+        floor = math.floor
+        for key, (lat, lng) in points.items():
+            cell = (floor((lat + 90) / size), floor((lng + 180) / size))
+            keys = cells.get(cell)
+            if keys is None:
+                cells[cell] = {key}
+            else:
+                keys.add(key)
+
+    def remove(self, key):
+        """ Removes a key from the index, if it is there.
+
+        Args:
+            key (str): storage key
+        """
+        try:
+            point = self.__points.pop(key)
+        except KeyError:
+            return
+        cell = self.__cell(*point)
+        keys = self.__cells[cell]
+        keys.discard(key)
+        if not keys:
+            del self.__cells[cell]
+
+    def within(self, south, west, north, east):
+        """ Iterates over the keys positioned in a bounding box.
+
+        Args:
+            south, west, north, east (float): the box, in degrees; `west`
+                is greater than `east` for a box crossing the antimeridian
+
+        Yields:
+            tuple: `(key, (latitude, longitude))`, in no particular order
+        """
+        spans = [(west, east)] if west <= east else \
+            [(west, 180), (-180, east)]
+        rows = (self.__cell(max(south, -90), 0)[0],
+                self.__cell(min(north, 90), 0)[0])
+        points = self.__points
+        for low, high in spans:
+            cols = (self.__cell(0, low)[1], self.__cell(0, high)[1])
+            area = (rows[1] - rows[0] + 1) * (cols[1] - cols[0] + 1)
+            if area <= len(self.__cells):
+                cells = ((row, col)
+                         for row in range(rows[0], rows[1] + 1)
+                         for col in range(cols[0], cols[1] + 1))
+            else:
+                # fewer cells hold points than the box overlaps
+                cells = [cell for cell in self.__cells
+                         if rows[0] <= cell[0] <= rows[1] and
+                         cols[0] <= cell[1] <= cols[1]]
+            for cell in cells:
+                for key in self.__cells.get(cell, ()):
+                    lat, lng = points[key]
+                    if south <= lat <= north and low <= lng <= high:
+                        yield key, (lat, lng)
+
+    def near(self, lat, lng, radius_km, limit=None):
+        """ Returns the keys positioned within a distance of a point.
+
+        Args:
+            lat, lng (float): the point, in degrees
+            radius_km (float): the distance, in kilometres
+            limit (int, optional): the most keys to return
+
+        Returns:
+            list: `(distance_km, key)` pairs, nearest first
+        """
+        found = []
+        for key, point in self.within(*radius_box(lat, lng, radius_km)):
+            distance = distance_km(lat, lng, *point)
+            if distance <= radius_km:
+                found.append((distance, key))
+        if limit is not None:
+            return heapq.nsmallest(limit, found)
+        found.sort()
+        return found
+
+
+class TextIndex:
+    """
+    TextIndex
+
+    Inverted index of the words of free text attributes: maps each word
+    to the keys whose text holds it, with the number of times it does.
+    """
+
+    def __init__(self, attr, state=None):
+        """ Initializes an index.
+
+        Args:
+            attr (str or tuple): indexed attribute, or attributes
+            state (tuple, optional): what `state()` returned, to restore
+        """
+        self.attr = attr
+        self.__docs, self.__postings = state or ({}, {})
+
+    def __len__(self):
+        """ Returns the number of keys indexed. """
+        return len(self.__docs)
+
+    def __contains__(self, key):
+        """ Tells whether a key is indexed. """
+        return key in self.__docs
+
+    def __index(self, key, terms):
+        """ Records the word counts of a key. """
+        self.__docs[key] = terms
+        postings = self.__postings
+        for term, count in terms.items():
+            keys = postings.get(term)
+            if keys is None:
+                postings[term] = {key: count}
+            else:
+                keys[key] = count
+
+    def add(self, key, value):
+        """ Indexes the words of a key's text, replacing its previous text.
+
+        Args:
+            key (str): storage key
+            value (str or tuple): the text, or the texts of several
+                attributes; values that are not strings are left out
+        """
+        self.remove(key)
+        terms = {}
+        for text in value if isinstance(value, tuple) else (value,):
+            if isinstance(text, str):
+                for term in tokenize(text):
+                    terms[term] = terms.get(term, 0) + 1
+        self.__index(key, terms)
+
+    def update(self, items):
+        """ Indexes the texts of keys.
+
+        Args:
+            items (iterable): `(key, value)` pairs
+        """
+        for key, value in items:
+            self.add(key, value)
+
+    def remove(self, key):
+        """ Removes a key from the index, if it is there.
+
+        Args:
+            key (str): storage key
+        """
+        terms = self.__docs.pop(key, None)
+        if not terms:
+            return
+        postings = self.__postings
+        for term in terms:
+            keys = postings[term]
+            del keys[key]
+            if not keys:
+                del postings[term]
+
+    def search(self, query, limit=None):
+        """ Returns the keys whose text matches a query, see
+        `parse_query()`, the most relevant first: by the number of
+        times the words of the query appear, then by key.
+
+        Args:
+            query (str): the query
+            limit (int, optional): the most keys to return
+
+        Returns:
+            list: `(score, key)` pairs
+        """
+        postings = self.__postings
+        groups = parse_query(query)
+        scores = {}
+        for group in groups:
+            lists = sorted((postings.get(term, {}) for term in group), key=len)
+            found = lists[0].keys()
+            for keys in lists[1:]:
+                found = found & keys.keys()
+            for key in found:
+                scores[key] = 0
+        for term in {term for group in groups for term in group}:
+            for key, count in postings.get(term, {}).items():
+                if key in scores:
+                    scores[key] += count
+        ranked = ((-score, key) for key, score in scores.items())
+        if limit is not None:
+            ranked = heapq.nsmallest(limit, ranked)
+        else:
+            ranked = sorted(ranked)
+        return [(-score, key) for score, key in ranked]
+
+    def state(self):
+        """ Returns the word counts by key and the keys by word, to be
+        persisted and restored through the constructor. Both are kept, as
+        rebuilding either from the other takes longer than reading it. """
+        return self.__docs, self.__postings
+
+
+class BitmapIndex:
+    """
+    BitmapIndex
+
+    Indexes a list attribute, as `Place.amenity_ids`, by the values the
+    lists hold. Every key gets an ordinal, and every value the set of
+    ordinals of the keys holding it, as the bits of an int, so the keys
+    holding several values are found by and-ing their bitsets. Items that
+    cannot be hashed are left out.
+    """
+
+    def __init__(self, attr):
+        """ Initializes an empty index.
+
+        Args:
+            attr (str): indexed attribute
+        """
+        self.attr = attr
+        self.__ordinals = {}
+        self.__keys = []
+        self.__free = []
+        self.__values = {}
+        self.__bits = {}
+
+    def __len__(self):
+        """ Returns the number of keys indexed. """
+        return len(self.__ordinals)
+
+    @staticmethod
+    def __items(value):
+        """ Returns the distinct hashable items of a list value. """
+        if not isinstance(value, (list, tuple, set, frozenset)):
+            return ()
+        items = {}
+        for item in value:
+            try:
+                items[item] = None
+            except TypeError:
+                pass
+        return tuple(items)
+
+    def add(self, key, value):
+        """ Indexes a key under the items of its list, replacing its
+        previous ones.
+
+        Args:
+            key (str): storage key
+            value (list): attribute value; other values hold no item
+        """
+        self.remove(key)
+        if self.__free:
+            ordinal = self.__free.pop()
+            self.__keys[ordinal] = key
+        else:
+            ordinal = len(self.__keys)
+            self.__keys.append(key)
+        self.__ordinals[key] = ordinal
+        items = self.__values[key] = self.__items(value)
+        bit = 1 << ordinal
+        bits = self.__bits
+        for item in items:
+            bits[item] = bits.get(item, 0) | bit
+
+    def update(self, items):
+        """ Indexes keys under the items of their lists.
+
+        Args:
+            items (iterable): `(key, value)` pairs
+        """
+        if self.__keys:
+            # ordinals were handed out, and may be free to reuse
+            for key, value in items:
+                self.add(key, value)
+            return
+        # setting the bits one at a time copies a growing int every time
+        ordinals = {}
+        for ordinal, (key, value) in enumerate(items):
+            self.__ordinals[key] = ordinal
+            self.__keys.append(key)
+            found = self.__values[key] = self.__items(value)
+            for item in found:
+                ordinals.setdefault(item, []).append(ordinal)
+        size = len(self.__keys) // 8 + 1
+        for item, found in ordinals.items():
+            bitmap = bytearray(size)
+            for ordinal in found:
+                bitmap[ordinal >> 3] |= 1 << (ordinal & 7)
+            self.__bits[item] = int.from_bytes(bitmap, "little")
+
+    def remove(self, key):
+        """ Removes a key from the index, if it is there.
+
+        Args:
+            key (str): storage key
+        """
+        ordinal = self.__ordinals.pop(key, None)
+        if ordinal is None:
+            return
+        bits = self.__bits
+        mask = ~(1 << ordinal)
+        for item in self.__values.pop(key):
+            bits[item] &= mask
+            if not bits[item]:
+                del bits[item]
+        self.__keys[ordinal] = None
+        self.__free.append(ordinal)
+
+    def having(self, items):
+        """ Returns the keys whose list holds every one of some items.
+
+        Args:
+            items (iterable): the items; every key holds none of them
+
+        Returns:
+            list: the keys
+        """
+        found = None
+        for item in items:
+            try:
+                bits = self.__bits.get(item, 0)
+            except TypeError:
+                bits = 0
+            found = bits if found is None else found & bits
+            if not found:
+                return []
+        if found is None:
+            return list(self.__ordinals)
+        keys = self.__keys
+        digits = bin(found)[:1:-1]
+        ordinal = digits.find("1")
+        result = []
+        while ordinal >= 0:
+            result.append(keys[ordinal])
+            ordinal = digits.find("1", ordinal + 1)
+        return result
+
+
+def holds_all(value, items):
+    """ Tells whether a list attribute holds every one of some items, as
+    `BitmapIndex.having()` does.
+
+    Args:
+        value (list): attribute value; other values hold no item
+        items (list): the items
+
+    Returns:
+        bool: True if `value` is a list holding every item
+    """
+    if not isinstance(value, (list, tuple, set, frozenset)):
+        return not items
+    return all(item in value for item in items)
+
+
+def write_text_indexes(f, stamps, entries):
+    """ Writes text indexes to a file.
+
+    Args:
+        f (file): binary file opened for writing
+        stamps (tuple): identifies the files the indexes were built from
+        entries (list): `(class name, attr, state)` of every index
+    """
+    f.write(TEXT_MAGIC)
+    # marshal reads and writes files a few bytes at a time
+    f.write(marshal.dumps((stamps, entries)))
+
+
+def read_text_indexes(f):
+    """ Reads text indexes written by `write_text_indexes()`.
+
+    Args:
+        f (file): binary file opened for reading
+
+    Returns:
+        tuple: `(stamps, entries)`
+
+    Raises:
+        ValueError: If the file does not hold text indexes.
+    """
+    if f.read(len(TEXT_MAGIC)) != TEXT_MAGIC:
+        raise ValueError("not a text index")
+    try:
+        return marshal.loads(f.read())
+    except (EOFError, TypeError) as e:
+        raise ValueError("damaged text index") from e
@@ -0,0 +1,378 @@
+#!/usr/bin/python3
+"""
+Module: serializers.py
+This module defines the codecs FileStorage writes its snapshots with.
+
+A codec writes `(key, record)` pairs, where a record is the `to_dict()` of
+an object, to a binary file and reads them back one at a time:
+
+    json: the original format, one JSON object mapping keys to records.
+    binary: a header followed by length-prefixed frames. Attribute and
+        class names are written once to a string table and referred to by
+        number; records are `marshal` tuples.
+
+Readers pick the codec from the file header, so a file can always be read
+whatever codec the storage is configured to write.
+
+Either codec can be wrapped in gzip, bz2 or lzma compression. Compression
+streams in both directions, and compressed files are recognized by their
+magic bytes when read.
+"""
+import bz2
+import gzip
+import io
+import json
+import lzma
+import marshal
+import re
+import struct
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_items(f, chunk_size=1 << 16):
+    """
+    Iterates over the members of the JSON object stored in a file without
+    reading the whole file or building the whole object first.
+
+    Args:
+        f (file): A text file holding a single JSON object.
+        chunk_size (int): Number of characters read at a time.
+
+    Yields:
+        tuple: `(key, value)` for each member, in file order.
+
+    Raises:
+        json.decoder.JSONDecodeError: If the file is not a JSON object.
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(chunk_size)
+    pos = 0
+    eof = not buf
+    expect = "{"
+
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        if pos == len(buf) and not eof:
+            chunk = f.read(chunk_size)
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+            continue
+        char = buf[pos:pos + 1]
+        if expect in ("{", ",") and char == expect:
+            pos += 1
+            expect = "first" if expect == "{" else "key"
+            continue
+        if expect in ("first", ",") and char == "}":
+            return
+        if expect not in ("first", "key"):
+            raise json.decoder.JSONDecodeError(
+                "Expecting '{}'".format(expect), buf, pos)
+        while True:
+            # a member is only complete once the delimiter after it has been
+            # read, otherwise "2" could be the start of "2.5"
+            try:
+                key, end = decoder.raw_decode(buf, pos)
+                end = _WHITESPACE.match(buf, end).end()
+                if buf[end:end + 1] != ":":
+                    raise json.decoder.JSONDecodeError(
+                        "Expecting ':' delimiter", buf, end)
+                value, end = decoder.raw_decode(
+                    buf, _WHITESPACE.match(buf, end + 1).end())
+                after = _WHITESPACE.match(buf, end).end()
+                if buf[after:after + 1] in (",", "}") or eof:
+                    break
+            except json.decoder.JSONDecodeError:
+                if eof:
+                    raise
+            chunk = f.read(chunk_size)
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+        yield key, value
+        pos = end
+        expect = ","
+
+
+class JSONCodec:
+    """
+    JSONCodec
+
+    Reads and writes a snapshot as one JSON object.
+    """
+    name = "json"
+    magic = b""
+    indexable = True
+
+    def write(self, f, items, spans=None):
+        """ Writes records one at a time through the file's buffer. The
+        output matches `json.dumps()` of the `{key: record}` dictionary.
+
+        Args:
+            f (file): binary file opened for writing
+            items (iterable): `(key, record)` pairs
+            spans (list, optional): receives `(key, offset, length)`, the
+                byte range of each record, which `json.loads()` can decode
+                on its own
+        """
+        text = io.TextIOWrapper(f, encoding="utf-8")
+        dumps = json.dumps
+        separator = "{"
+        # json.dumps() escapes non-ASCII, so characters count bytes
+        pos = 0
+        for key, record in items:
+            head = separator + dumps(key) + ": "
+            value = dumps(record)
+            text.write(head)
+            text.write(value)
+            if spans is not None:
+                spans.append((key, pos + len(head), len(value)))
+            pos += len(head) + len(value)
+            separator = ", "
+        text.write("}" if separator == ", " else "{}")
+        text.flush()
+        text.detach()
+
+    def read(self, f):
+        """ Reads records one at a time.
+
+        Args:
+            f (file): binary file opened for reading
+
+        Yields:
+            tuple: `(key, record)` pairs
+        """
+        text = io.TextIOWrapper(f, encoding="utf-8")
+        try:
+            yield from iter_json_items(text)
+        finally:
+            text.detach()
+
+
+class BinaryCodec:
+    """
+    BinaryCodec
+
+    Reads and writes a snapshot as frames of a one byte type and a four
+    byte length. A name frame appends a UTF-8 string to the string table;
+    a record frame holds the `marshal` of `(class, id, fields)`, where
+    `class` is a string table index and `fields` alternates string table
+    indexes of attribute names with their values. The `__class__` entry is
+    implied by `class`.
+    """
+    name = "binary"
+    magic = b"\x00HBNB\x01\n"
+    # records refer to the string table, so cannot be read on their own
+    indexable = False
+    NAME = 1
+    RECORD = 2
+    frame = struct.Struct("<BI")
+
+    def write(self, f, items):
+        """ Writes records one at a time.
+
+        Args:
+            f (file): binary file opened for writing
+            items (iterable): `(key, record)` pairs
+        """
+        pack = self.frame.pack
+        dumps = marshal.dumps
+        table = {}
+
+        def index(name):
+            """ Returns the string table index of a name, adding it """
+            if name not in table:
+                data = name.encode("utf-8")
+                f.write(pack(self.NAME, len(data)))
+                f.write(data)
+                table[name] = len(table)
+            return table[name]
+
+        f.write(self.magic)
+        for key, record in items:
+            cls_name, obj_id = key.split(".", 1)
+            fields = []
+            for name, value in record.items():
+                if name != "__class__":
+                    fields.append(index(name))
+                    fields.append(value)
+            data = dumps((index(cls_name), obj_id, tuple(fields)))
+            f.write(pack(self.RECORD, len(data)))
+            f.write(data)
+
+    def read(self, f):
+        """ Reads records one at a time.
+
+        Args:
+            f (file): binary file opened for reading
+
+        Yields:
+            tuple: `(key, record)` pairs
+
+        Raises:
+            ValueError: If the file is not a binary snapshot or is cut short.
+        """
+        if f.read(len(self.magic)) != self.magic:
+            raise ValueError("not a binary snapshot")
+        unpack = self.frame.unpack
+        size = self.frame.size
+        loads = marshal.loads
+        table = []
+        while True:
+            header = f.read(size)
+            if not header:
+                return
+            if len(header) < size:
+                raise ValueError("truncated binary snapshot")
+            kind, length = unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                raise ValueError("truncated binary snapshot")
+            if kind == self.NAME:
+                table.append(data.decode("utf-8"))
+                continue
+            cls_index, obj_id, fields = loads(data)
+            cls_name = table[cls_index]
+            record = {}
+            for i in range(0, len(fields), 2):
+                record[table[fields[i]]] = fields[i + 1]
+            record["__class__"] = cls_name
+            yield cls_name + "." + obj_id, record
+
+
+CODECS = {codec.name: codec for codec in (JSONCodec(), BinaryCodec())}
+
+
+def _gzip_file(f, mode):
+    """ Opens a gzip stream over a file object """
+    return gzip.GzipFile(fileobj=f, mode=mode)
+
+
+COMPRESSIONS = {
+    "gzip": (b"\x1f\x8b", _gzip_file),
+    "bz2": (b"BZh", bz2.BZ2File),
+    "lzma": (b"\xfd7zXZ\x00", lzma.LZMAFile),
+}
+
+EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "lzma", ".lzma": "lzma"}
+
+
+def get_codec(name):
+    """ Returns the codec registered under a name.
+
+    Args:
+        name (str): codec name
+
+    Returns:
+        codec: the codec
+
+    Raises:
+        ValueError: If no codec has that name.
+    """
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError("unknown codec: {}".format(name)) from None
+
+
+def get_compression(name):
+    """ Checks a compression name.
+
+    Args:
+        name (str): "gzip", "bz2", "lzma", or "none" for no compression
+
+    Returns:
+        str: the name, or None for no compression
+
+    Raises:
+        ValueError: If no compression has that name.
+    """
+    if name is None or name == "none":
+        return None
+    if name not in COMPRESSIONS:
+        raise ValueError("unknown compression: {}".format(name))
+    return name
+
+
+def compression_for(path):
+    """ Returns the compression implied by a file extension.
+
+    Args:
+        path (str): file path
+
+    Returns:
+        str: the compression name, or None
+    """
+    for extension, name in EXTENSIONS.items():
+        if path.endswith(extension):
+            return name
+    return None
+
+
+def compress(f, name):
+    """ Wraps a file so what is written to it is compressed on the way.
+    Closing the wrapper finishes the compressed stream but leaves `f` open.
+
+    Args:
+        f (file): binary file opened for writing
+        name (str): compression name, or None
+
+    Returns:
+        file: the file to write to, `f` itself without compression
+    """
+    if name is None:
+        return f
+    return COMPRESSIONS[name][1](f, "wb")
+
+
+def decompress(f):
+    """ Wraps a file so it is decompressed while read, if its header shows
+    it is compressed.
+
+    Args:
+        f (io.BufferedReader): binary file opened for reading
+
+    Returns:
+        file: the file to read from, `f` itself if it is not compressed
+    """
+    head = f.peek(16)
+    for magic, opener in COMPRESSIONS.values():
+        if head.startswith(magic):
+            return opener(f, "rb")
+    return f
+
+
+def detect(f):
+    """ Returns the codec a file was written with, from its header.
+
+    Args:
+        f (io.BufferedReader): binary file opened for reading
+
+    Returns:
+        codec: the codec
+    """
+    head = f.peek(16)
+    for codec in CODECS.values():
+        if codec.magic and head.startswith(codec.magic):
+            return codec
+    return CODECS["json"]
+
+
+def iter_records(f):
+    """ Reads the records of a snapshot written with any codec and
+    compression.
+
+    Args:
+        f (io.BufferedReader): binary file opened for reading
+
+    Yields:
+        tuple: `(key, record)` pairs
+
+    Raises:
+        ValueError: If the file is not a snapshot or is cut short.
+    """
+    data = decompress(f)
+    if data is f:
+        yield from detect(f).read(f)
+        return
+    try:
+        yield from detect(data).read(data)
+    except (EOFError, OSError, lzma.LZMAError) as e:
+        raise ValueError("damaged compressed snapshot: {}".format(e)) from e
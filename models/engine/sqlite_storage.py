@@ -0,0 +1,671 @@
+#!/usr/bin/python3
+"""
+Module: sqlite_storage.py
+This module defines the SQLiteStorage class, a storage engine keeping one
+row per object in an SQLite database, with the same interface as
+FileStorage.
+
+Rows are only read when an object is asked for, and `save()` only writes
+the rows of the objects changed or deleted since the last save. Foreign
+keys, the numeric attributes and those declared with `add_index()` are
+indexed by the database, for `children()`, `where()`, `order_by()` and
+the position queries `near()` and `within()`. `having()` selects the rows
+whose list attribute holds some values with `json_each()`.
+"""
+import json
+import sqlite3
+from contextlib import contextmanager
+from itertools import islice
+from models.engine.file_storage import StoredObjects, model_classes
+from models.engine.indexes import GeoIndex, SortedIndex, TextIndex
+from models.engine.indexes import check_operator
+from models.engine.indexes import foreign_keys, holds_all
+from models.engine.indexes import is_number, matches
+from models.engine.indexes import numeric_fields, radius_box, read_attr
+from models.engine.indexes import relation
+from models.engine.serializers import iter_records
+
+
+class SQLiteStorage:
+    """
+    A class for managing storage of objects in an SQLite database.
+
+    Attributes:
+        __db_path (str): The path to the database file.
+        __connection (sqlite3.Connection): The open database, or None
+            before `reload()`.
+        __objects (dict): The objects read or added so far, by key.
+        __loaded (set): Names of the classes whose rows have all been read,
+            or None once every row has been read.
+        __dirty (dict): Maps the keys written since the last save to the
+            set of attribute names that changed, or None when the whole
+            object is new.
+        __deleted (set): Keys deleted since the last save.
+    """
+
+    def __init__(self, db_path="file.db"):
+        """
+        Initializes the storage.
+
+        Args:
+            db_path (str): The path to the database file.
+        """
+        self.__db_path = db_path
+        self.__connection = None
+        self.__objects = StoredObjects(self.__track)
+        self.__loaded = set()
+        self.__dirty = {}
+        self.__deleted = set()
+        self.__depth = 0
+        self.__pending = False
+
+    def all(self, cls=None):
+        """
+        Retrieves all objects stored in the storage, reading the rows not
+        read yet.
+
+        Args:
+            cls (type or str, optional): Only return instances of this class.
+
+        Returns:
+            dict: A dictionary containing all objects, or a new dictionary
+                holding only the instances of `cls`. The dictionary of all
+                objects is the storage's own; keys set or removed in it are
+                stored or deleted as by `new()` and `delete()`.
+        """
+        if cls is None:
+            if self.__loaded is not None:
+                self.__load("SELECT key, data FROM objects")
+                self.__loaded = None
+            return self.__objects
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if self.__loaded is not None and cls not in self.__loaded:
+            self.__load("SELECT key, data FROM objects WHERE class = ?",
+                        (cls,))
+            self.__loaded.add(cls)
+        prefix = cls + "."
+        return {key: obj for key, obj in self.__objects.items()
+                if key.startswith(prefix)}
+
+    def get(self, cls, id):
+        """
+        Retrieves one object, reading only its row.
+
+        Args:
+            cls (type or str): The class of the object, or its name.
+            id (str): The id of the object.
+
+        Returns:
+            BaseModel: The object, or None if it is not stored.
+        """
+        # pylint: disable=redefined-builtin
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        key = cls + "." + id
+        if key not in self.__objects and key not in self.__deleted:
+            self.__load("SELECT key, data FROM objects WHERE key = ?", (key,))
+        return self.__objects.get(key)
+
+    def count(self, cls=None):
+        """
+        Counts the objects stored in the storage. Without unsaved changes
+        this is answered by the database without reading any row.
+
+        Args:
+            cls (type or str, optional): Only count instances of this class.
+
+        Returns:
+            int: The number of objects.
+        """
+        if cls is not None and not isinstance(cls, str):
+            cls = cls.__name__
+        prefix = "" if cls is None else cls + "."
+        if any(key.startswith(prefix)
+               for key in list(self.__dirty) + list(self.__deleted)):
+            return len(self.all(cls))
+        if cls is None:
+            row = self.__db().execute("SELECT COUNT(*) FROM objects")
+        else:
+            row = self.__db().execute(
+                "SELECT COUNT(*) FROM objects WHERE class = ?", (cls,))
+        return row.fetchone()[0]
+
+    def children(self, cls, id, child_cls):
+        """
+        Retrieves the instances of a class referring to one object through
+        the foreign key named after its class, e.g. the Reviews whose
+        `place_id` is the id of a Place. Only the matching rows are read.
+
+        Args:
+            cls (type or str): The class of the object, or its name.
+            id (str): The id of the object.
+            child_cls (type or str): The referring class, or its name.
+
+        Returns:
+            dict: The referring objects, by key.
+
+        Raises:
+            ValueError: If `child_cls` has no foreign key to `cls`.
+        """
+        # pylint: disable=redefined-builtin
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if isinstance(child_cls, str):
+            child_cls = model_classes()[child_cls]
+        attr = relation(cls, child_cls)
+        name = child_cls.__name__
+        if self.__loaded is not None and name not in self.__loaded:
+            self.__load("SELECT key, data FROM objects WHERE class = ? AND "
+                        "{} = ?".format(self.__extract(attr)), (name, id))
+        # the matching rows are in memory now, with any unsaved changes
+        prefix = name + "."
+        return {key: obj for key, obj in self.__objects.items()
+                if key.startswith(prefix) and getattr(obj, attr, None) == id}
+
+    def add_index(self, cls, attr):
+        """
+        Declares a secondary index on an attribute of a class, so that
+        `where()` reads only the matching rows. The index is created in
+        the database and kept there.
+
+        Args:
+            cls (type or str): The class, or its name. The index covers the
+                attribute in every class.
+            attr (str): The attribute.
+
+        Raises:
+            ValueError: If `attr` is not a valid attribute name.
+        """
+        # pylint: disable=unused-argument
+        with self.__db() as db:
+            db.execute("CREATE INDEX IF NOT EXISTS objects_{0} ON objects "
+                       "(class, {1})".format(attr, self.__extract(attr)))
+
+    def where(self, cls, attr, value, op="=="):
+        """
+        Retrieves the instances of a class whose attribute satisfies a
+        predicate. Instances without the attribute are compared through
+        the class default, or None. "==" and "in" on numbers and strings
+        only read the matching rows.
+
+        Args:
+            cls (type or str): The class, or its name.
+            attr (str): The attribute compared.
+            value: The value compared with, an iterable of values for "in".
+            op (str): "==", "!=" or "in".
+
+        Returns:
+            dict: The matching objects, by key.
+
+        Raises:
+            ValueError: If `op` is not supported or `attr` is not a valid
+                attribute name.
+        """
+        check_operator(op)
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        values = list(value) if op == "in" else [value]
+        default = getattr(model_classes().get(cls), attr, None)
+        if self.__loaded is not None and cls not in self.__loaded:
+            # rows without the attribute hold the default, which the
+            # database cannot see
+            if op != "!=" and all(
+                    isinstance(item, (str, int, float)) and item != default
+                    for item in values):
+                if values:
+                    self.__load(
+                        "SELECT key, data FROM objects WHERE class = ? AND "
+                        "{} IN ({})".format(self.__extract(attr),
+                                            ", ".join("?" * len(values))),
+                        [cls] + values)
+            else:
+                self.all(cls)
+        if op == "in":
+            value = values
+        # the matching rows are in memory now, with any unsaved changes
+        prefix = cls + "."
+        return {key: obj for key, obj in self.__objects.items()
+                if key.startswith(prefix) and
+                matches(getattr(obj, attr, None), op, value)}
+
+    def order_by(self, cls, attr, low=None, high=None, limit=None,
+                 reverse=False):
+        """
+        Retrieves the instances of a class in the order of a numeric
+        attribute, optionally between two bounds and up to a number of
+        instances; `limit=1` gives the smallest value, or the largest with
+        `reverse`. Instances whose value is not a number are left out;
+        those without the attribute have the class default.
+
+        Without unsaved changes to the class, and unless the class default
+        is in range, the database reads the rows in order from the index
+        of the attribute. Otherwise the instances are sorted in memory.
+
+        Args:
+            cls (type or str): The class, or its name.
+            attr (str): The attribute.
+            low (int or float, optional): The smallest value, included.
+            high (int or float, optional): The largest value, included.
+            limit (int, optional): The most instances to return.
+            reverse (bool): Start from the largest value.
+
+        Returns:
+            dict: The objects, by key, in order.
+
+        Raises:
+            ValueError: If `attr` is not a valid attribute name.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        prefix = cls + "."
+        default = getattr(model_classes().get(cls), attr, None)
+        if any(key.startswith(prefix)
+               for key in list(self.__dirty) + list(self.__deleted)) or \
+                (is_number(default) and
+                 (low is None or low <= default) and
+                 (high is None or default <= high)):
+            # rows without the attribute hold the default, which the
+            # database cannot see
+            index = SortedIndex(attr)
+            index.update((key, getattr(obj, attr, None))
+                         for key, obj in self.all(cls).items())
+            keys = islice(index.range(low, high, reverse), limit)
+            return {key: self.__objects[key] for key in keys}
+        value = self.__extract(attr)
+        query = "SELECT key, data FROM objects WHERE class = ? AND " \
+            "typeof({0}) IN ('integer', 'real')".format(value)
+        params = [cls]
+        for bound, test in ((low, ">="), (high, "<=")):
+            if bound is not None:
+                query += " AND {} {} ?".format(value, test)
+                params.append(bound)
+        order = " DESC" if reverse else ""
+        query += " ORDER BY {0}{1}, key{1}".format(value, order)
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        keys = self.__load(query, params)
+        return {key: self.__objects[key] for key in keys}
+
+    def near(self, cls, lat, lng, radius_km, limit=None):
+        """
+        Retrieves the instances of a class whose `latitude` and
+        `longitude` are within a distance of a point, nearest first. Only
+        the rows in the bounding box of the circle are read.
+
+        Args:
+            cls (type or str): The class, or its name.
+            lat (float): The latitude of the point, in degrees.
+            lng (float): The longitude of the point, in degrees.
+            radius_km (float): The distance, in kilometres.
+            limit (int, optional): The most instances to return.
+
+        Returns:
+            dict: The objects, by key, nearest first.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        index = self.__geo_index(cls, *radius_box(lat, lng, radius_km))
+        return {key: self.__objects[key]
+                for _, key in index.near(lat, lng, radius_km, limit)}
+
+    def within(self, cls, south, west, north, east):
+        """
+        Retrieves the instances of a class whose `latitude` and
+        `longitude` are in a bounding box, edges included. Only the rows
+        in the box are read.
+
+        Args:
+            cls (type or str): The class, or its name.
+            south (float): The smallest latitude, in degrees.
+            west (float): The westmost longitude, in degrees. A box
+                crossing the antimeridian has `west` greater than `east`.
+            north (float): The largest latitude, in degrees.
+            east (float): The eastmost longitude, in degrees.
+
+        Returns:
+            dict: The objects, by key.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        index = self.__geo_index(cls, south, west, north, east)
+        return {key: self.__objects[key]
+                for key, _ in index.within(south, west, north, east)}
+
+    def having(self, cls, attr, values):
+        """
+        Retrieves the instances of a class whose list attribute, as
+        `Place.amenity_ids`, holds every one of some values. Only the
+        rows holding them are read.
+
+        Args:
+            cls (type or str): The class, or its name.
+            attr (str): The list attribute.
+            values (iterable): The values; every instance holds none.
+
+        Returns:
+            dict: The matching objects, by key.
+
+        Raises:
+            ValueError: If `attr` is not a valid attribute name.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        values = list(values)
+        default = getattr(model_classes().get(cls), attr, None)
+        if self.__loaded is not None and cls not in self.__loaded:
+            if values and all(isinstance(value, (str, int, float))
+                              for value in values) and \
+                    not holds_all(default, values):
+                self.__load(
+                    "SELECT key, data FROM objects WHERE class = ?" +
+                    " AND EXISTS (SELECT 1 FROM {} WHERE value = ?)".format(
+                        self.__extract(attr, "json_each")) * len(values),
+                    [cls] + values)
+            else:
+                # rows without the attribute hold the default, which the
+                # database cannot see
+                self.all(cls)
+        # the matching rows are in memory now, with any unsaved changes
+        prefix = cls + "."
+        return {key: obj for key, obj in self.__objects.items()
+                if key.startswith(prefix) and
+                holds_all(getattr(obj, attr, None), values)}
+
+    def search(self, cls, attrs, query, limit=None):
+        """
+        Retrieves the instances of a class whose text attributes hold the
+        words of a query: words separated by OR are alternatives, and all
+        the other words must appear (see `models.engine.indexes`). The
+        instances where the words appear most often come first. Every
+        row of the class is read.
+
+        Args:
+            cls (type or str): The class, or its name.
+            attrs (tuple): The text attributes searched.
+            query (str): The words searched, e.g. "quiet OR calm".
+            limit (int, optional): The most instances to return.
+
+        Returns:
+            dict: The objects, by key, most relevant first.
+        """
+        attrs = tuple(attrs)
+        objects = self.all(cls)
+        index = TextIndex(attrs)
+        index.update((key, read_attr(obj, attrs))
+                     for key, obj in objects.items())
+        return {key: objects[key] for _, key in index.search(query, limit)}
+
+    def new(self, obj):
+        """
+        Adds a new object to the storage.
+
+        Args:
+            obj (BaseModel): The object to be added.
+        """
+        key = obj.__class__.__name__ + "." + obj.id
+        dict.__setitem__(self.__objects, key, obj)
+        self.__track(self.__objects, key, obj)
+
+    def mark_dirty(self, obj, attr=None):
+        """
+        Records that a stored object changed and must be written by the
+        next `save()`. Objects that are not in the storage are ignored.
+
+        Args:
+            obj (BaseModel): The object that changed.
+            attr (str, optional): The attribute that changed. Without it the
+                whole object is considered changed.
+        """
+        obj_id = getattr(obj, "id", None)
+        if obj_id is None:
+            return
+        key = obj.__class__.__name__ + "." + obj_id
+        if self.__objects.get(key) is not obj:
+            return
+        dirty = self.__dirty
+        if attr is None:
+            dirty[key] = None
+        elif key not in dirty:
+            dirty[key] = {attr}
+        elif dirty[key] is not None:
+            dirty[key].add(attr)
+
+    def dirty(self):
+        """
+        Iterates over the changes made since the last save.
+
+        Yields:
+            tuple: `(key, obj, attrs)` for every written object, where
+                `attrs` is the set of changed attribute names or None when
+                the whole object is new, then `(key, None, None)` for every
+                deleted object.
+        """
+        for key, attrs in list(self.__dirty.items()):
+            obj = self.__objects.get(key)
+            if obj is not None:
+                yield key, obj, attrs
+        for key in list(self.__deleted):
+            yield key, None, None
+
+    def clear_dirty(self, keys=None):
+        """
+        Forgets recorded changes once they have been saved.
+
+        Args:
+            keys (iterable, optional): The keys to forget. Defaults to all.
+        """
+        if keys is None:
+            self.__dirty.clear()
+            self.__deleted.clear()
+            return
+        for key in keys:
+            self.__dirty.pop(key, None)
+            self.__deleted.discard(key)
+
+    def delete(self, obj):
+        """
+        Removes an object from the storage.
+
+        Args:
+            obj (BaseModel): The object to be removed.
+        """
+        key = obj.__class__.__name__ + "." + obj.id
+        dict.pop(self.__objects, key, None)
+        self.__track(self.__objects, key, None)
+
+    def __track(self, objects, key, obj):
+        """
+        Records that an object was stored or removed, by `new()`,
+        `delete()` or in place in the dictionary `all()` returns.
+
+        Args:
+            objects (StoredObjects): The dictionary changed.
+            key (str): The key of the object.
+            obj (BaseModel): The object stored, or None if it was removed.
+        """
+        if objects is not self.__objects:
+            return
+        if obj is None:
+            self.__dirty.pop(key, None)
+            self.__deleted.add(key)
+            return
+        self.__dirty[key] = None
+        self.__deleted.discard(key)
+
+    def save(self):
+        """
+        Writes the objects changed or deleted since the last save to the
+        database, in one SQLite transaction.
+
+        Inside `transaction()` the save is deferred until the outermost
+        block exits.
+        """
+        if self.__depth:
+            self.__pending = True
+            return
+        rows = []
+        deleted = []
+        for key, obj, _ in self.dirty():
+            if obj is None:
+                deleted.append((key,))
+            else:
+                rows.append((key, obj.__class__.__name__,
+                             json.dumps(obj.to_dict())))
+        if rows or deleted:
+            with self.__db() as db:
+                db.executemany("INSERT OR REPLACE INTO objects "
+                               "(key, class, data) VALUES (?, ?, ?)", rows)
+                db.executemany("DELETE FROM objects WHERE key = ?", deleted)
+        self.clear_dirty()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Defers `save()` until the block exits, so a batch of changes is
+        flushed once. Blocks can be nested; the flush happens when the
+        outermost one exits, even if it raised. Changes are not rolled back.
+
+        Usage:
+            with storage.transaction():
+                obj.save()
+        """
+        self.__depth += 1
+        try:
+            yield self
+        finally:
+            self.__depth -= 1
+            if not self.__depth and self.__pending:
+                self.__pending = False
+                self.save()
+
+    def reload(self):
+        """
+        Opens the database, creating its table if needed, and forgets the
+        objects read so far. No row is read until an object is asked for.
+        """
+        if self.__connection is not None:
+            self.__connection.close()
+        self.__connection = sqlite3.connect(self.__db_path)
+        with self.__connection as db:
+            db.execute("CREATE TABLE IF NOT EXISTS objects ("
+                       "key TEXT PRIMARY KEY, "
+                       "class TEXT NOT NULL, "
+                       "data TEXT NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS objects_class "
+                       "ON objects (class)")
+            for attr in sorted({attr for cls in model_classes().values()
+                                for attr in foreign_keys(cls) +
+                                numeric_fields(cls)}):
+                db.execute("CREATE INDEX IF NOT EXISTS objects_{0} ON objects "
+                           "(class, {1})".format(attr, self.__extract(attr)))
+        self.__objects = StoredObjects(self.__track)
+        self.__loaded = set()
+        self.clear_dirty()
+
+    def migrate(self, json_path="file.json"):
+        """
+        Copies every object of a FileStorage snapshot, written with any
+        codec, into the database, replacing rows with the same key. The
+        file is read one record at a time and written in a single SQLite
+        transaction.
+
+        Args:
+            json_path (str): The path to the JSON file.
+
+        Returns:
+            int: The number of objects copied.
+        """
+        count = 0
+        with open(json_path, mode="rb") as f, self.__db() as db:
+            for key, value in iter_records(f):
+                db.execute("INSERT OR REPLACE INTO objects "
+                           "(key, class, data) VALUES (?, ?, ?)",
+                           (key, value["__class__"], json.dumps(value)))
+                dict.pop(self.__objects, key, None)
+                count += 1
+        return count
+
+    def __db(self):
+        """
+        Returns the database connection, opening it if needed.
+        """
+        if self.__connection is None:
+            self.reload()
+        return self.__connection
+
+    @staticmethod
+    def __extract(attr, function="json_extract"):
+        """
+        Returns the SQL expression reading an attribute from a row, as the
+        indexes on it are declared.
+
+        Args:
+            attr (str): The attribute.
+            function (str): The JSON function applied to the attribute,
+                `json_each` to read the items of a list.
+
+        Raises:
+            ValueError: If `attr` is not a valid attribute name.
+        """
+        if not attr.isidentifier():
+            raise ValueError("invalid attribute name {!r}".format(attr))
+        return "{}(data, '$.{}')".format(function, attr)
+
+    def __geo_index(self, cls, south, west, north, east):
+        """
+        Reads the rows of a class positioned in a bounding box and returns
+        a grid index of the positions of the instances of the class in
+        memory, which include them.
+
+        Args:
+            cls (str): The name of the class.
+            south, west, north, east (float): The box, in degrees.
+
+        Returns:
+            GeoIndex: The index.
+        """
+        attr = ("latitude", "longitude")
+        if self.__loaded is not None and cls not in self.__loaded:
+            # rows without a position are left out, as the index does
+            lat, lng = (self.__extract(name) for name in attr)
+            span = "{} BETWEEN ? AND ?" if west <= east else \
+                "({0} >= ? OR {0} <= ?)"
+            self.__load("SELECT key, data FROM objects WHERE class = ? "
+                        "AND {} BETWEEN ? AND ? AND ".format(lat) +
+                        span.format(lng),
+                        (cls, south, north, west, east))
+        index = GeoIndex(attr)
+        prefix = cls + "."
+        index.update((key, read_attr(obj, attr, True))
+                     for key, obj in self.__objects.items()
+                     if key.startswith(prefix))
+        return index
+
+    def __load(self, query, params=()):
+        """
+        Builds the objects of the rows a query returns, skipping those
+        already in memory or deleted since the last save.
+
+        Args:
+            query (str): A query selecting `key` and `data`.
+            params (tuple): The query parameters.
+
+        Returns:
+            list: The keys of the rows in memory, in the query's order.
+        """
+        classes = model_classes()
+        objects = self.__objects
+        deleted = self.__deleted
+        keys = []
+        for key, data in self.__db().execute(query, params):
+            if key in deleted:
+                continue
+            keys.append(key)
+            if key in objects:
+                continue
+            record = json.loads(data)
+            dict.__setitem__(objects, key,
+                             classes[record["__class__"]](**record))
+        return keys
@@ -5,6 +5,7 @@ This module defines the Place class.
 """
 
 from models.base_model import BaseModel
+from models import storage
 
 
 class Place(BaseModel):
@@ -25,6 +26,17 @@ class Place(BaseModel):
         longitude (float): The longitude coordinate of the place.
         amenity_ids (list): A list of amenity IDs associated with the place.
 
+    Methods:
+        near(lat, lng, radius_km, limit=None):
+            Returns the places within a distance of a point.
+        within(south, west, north, east):
+            Returns the places in a bounding box.
+        search(query, limit=None):
+            Returns the places whose name or description holds the words
+            of a query.
+        with_amenities(*amenities):
+            Returns the places having every one of some amenities.
+
     Inheritance:
         The Place class inherits from the BaseModel class.
     """
@@ -39,3 +51,62 @@ class Place(BaseModel):
     latitude = 0.0
     longitude = 0.0
     amenity_ids = []
+
+    @classmethod
+    def near(cls, lat, lng, radius_km, limit=None):
+        """ Returns the stored places within a distance of a point.
+
+        Args:
+            lat (float): latitude of the point, in degrees
+            lng (float): longitude of the point, in degrees
+            radius_km (float): distance, in kilometres
+            limit (int, optional): the most places to return
+
+        Returns:
+            list: the places, nearest first
+        """
+        return list(storage.near(cls, lat, lng, radius_km, limit).values())
+
+    @classmethod
+    def within(cls, south, west, north, east):
+        """ Returns the stored places in a bounding box.
+
+        Args:
+            south (float): smallest latitude, in degrees
+            west (float): westmost longitude, in degrees
+            north (float): largest latitude, in degrees
+            east (float): eastmost longitude, in degrees
+
+        Returns:
+            list: the places
+        """
+        return list(storage.within(cls, south, west, north, east).values())
+
+    @classmethod
+    def search(cls, query, limit=None):
+        """ Returns the stored places whose name or description hold the
+        words of a query. Words separated by OR are alternatives; all the
+        other words must appear.
+
+        Args:
+            query (str): the words searched, e.g. "garden AND quiet"
+            limit (int, optional): the most places to return
+
+        Returns:
+            list: the places, those where the words appear most first
+        """
+        return list(storage.search(cls, ("name", "description"), query,
+                                   limit).values())
+
+    @classmethod
+    def with_amenities(cls, *amenities):
+        """ Returns the stored places having every one of some amenities.
+
+        Args:
+            amenities (Amenity or str): the amenities, or their ids
+
+        Returns:
+            list: the places whose `amenity_ids` hold every amenity
+        """
+        ids = [getattr(amenity, "id", amenity) for amenity in amenities]
+        return list(storage.having(cls, "amenity_ids", ids).values())
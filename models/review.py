@@ -5,6 +5,7 @@ This module defines the Review class.
 """
 
 from models.base_model import BaseModel
+from models import storage
 
 
 class Review(BaseModel):
@@ -16,9 +17,28 @@ class Review(BaseModel):
         user_id (str): The ID of the user who wrote the review.
         text (str): The content of the review.
 
+    Methods:
+        search(query, limit=None):
+            Returns the reviews whose text holds the words of a query.
+
     Inheritance:
         The Review class inherits from the BaseModel class.
     """
     place_id = ""
     user_id = ""
     text = ""
+
+    @classmethod
+    def search(cls, query, limit=None):
+        """ Returns the stored reviews whose text hold the words of a
+        query. Words separated by OR are alternatives; all the other words
+        must appear.
+
+        Args:
+            query (str): the words searched, e.g. "clean OR tidy"
+            limit (int, optional): the most reviews to return
+
+        Returns:
+            list: the reviews, those where the words appear most first
+        """
+        return list(storage.search(cls, ("text",), query, limit).values())
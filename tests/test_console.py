@@ -10,13 +10,20 @@ Unittest classes:
     TestHBNBCommand_all
     TestHBNBCommand_destroy
     TestHBNBCommand_update
+    TestHBNBCommand_count
+    TestHBNBCommand_children
+    TestHBNBCommand_where
+    TestHBNBCommand_near
+    TestHBNBCommand_search
+    TestHBNBCommand_having
 """
+import json
 import os
 import sys
 import unittest
 from models import storage
 from models.engine.file_storage import FileStorage
-from console import HBNBCommand
+from console import HBNBCommand, print_objects
 from io import StringIO
 from unittest.mock import patch
 
@@ -60,7 +67,12 @@ class TestHBNBCommand_help(unittest.TestCase):
 
     def test_help_show(self):
         h = ("Show instance based on class name and id\n\n"
-             "            Usage: show <ClassName> <InstanceID>")
+             "            Usage: show <ClassName> <InstanceID> "
+             "[<attribute>[,...]]\n"
+             "            [format=json]\n"
+             "        Only the attributes listed are shown, if any; "
+             "format=json prints\n"
+             "        a JSON object.")
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertFalse(HBNBCommand().onecmd("help show"))
             self.assertEqual(h, output.getvalue().strip())
@@ -77,7 +89,18 @@ class TestHBNBCommand_help(unittest.TestCase):
     def test_help_all(self):
         h = ("Prints all string rep. of instances based on class name.\n\n"
              "        Usage:\n"
-             "            `all <ClassName>` or `all`")
+             "            `all [<ClassName> [<attribute>[,...]]] [limit=<n>] "
+             "[offset=<n>]\n"
+             "            [format=lines|json]` or\n"
+             "            `<ClassName>.all([<attribute>, ...] "
+             "[, limit=<n>, ...])`\n"
+             "        Only the attributes listed are shown, if any. With a "
+             "limit or an\n"
+             "        offset, instances are listed in id order. format=lines "
+             "prints one\n"
+             "        instance per line instead of a list, format=json one "
+             "JSON object\n"
+             "        per line.")
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertFalse(HBNBCommand().onecmd("help all"))
             self.assertEqual(h, output.getvalue().strip())
@@ -109,7 +132,8 @@ class TestHBNBCommand_help(unittest.TestCase):
         h = (""
              "Documented commands (type help <topic>):\n"
              "========================================\n"
-             "EOF  all  count  create  destroy  dict_update  help  quit  show  update")
+             "EOF  children  create   dict_update  help  quit    show    where \n"
+             "all  count     destroy  having       near  search  update  within")
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertFalse(HBNBCommand().onecmd("help"))
             self.assertEqual(h, output.getvalue().strip())
@@ -142,10 +166,11 @@ class TestHBNBCommand_create(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -225,10 +250,11 @@ class TestHBNBCommand_show(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -486,6 +512,37 @@ class TestHBNBCommand_show(unittest.TestCase):
             self.assertFalse(HBNBCommand().onecmd(command))
             self.assertEqual(obj.__str__(), output.getvalue().strip())
 
+    def test_show_fields(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("create Place"))
+            place = storage.get("Place", output.getvalue().strip())
+        place.name = "Loft"
+        place.price_by_night = 120
+        expected = "[Place] ({}) {}".format(
+            place.id, {"name": "Loft", "max_guest": 0, "view": None})
+        for command in ("show Place {} name,max_guest view",
+                        'Place.show("{}", "name", "max_guest", "view")'):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command.format(
+                    place.id)))
+                self.assertEqual(expected, output.getvalue().strip())
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "show Place {} name,price_by_night format=json".format(
+                    place.id)))
+            self.assertEqual({"id": place.id, "name": "Loft",
+                              "price_by_night": 120, "__class__": "Place"},
+                             json.loads(output.getvalue()))
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "show Place {} format=json".format(place.id)))
+            self.assertEqual(place.to_dict(), json.loads(output.getvalue()))
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "show Place {} format=list".format(place.id)))
+            self.assertEqual("** unknown format **",
+                             output.getvalue().strip())
+
 
 class TestHBNBCommand_destroy(unittest.TestCase):
     """Unittests for testing destroy from the HBNB command interpreter."""
@@ -500,10 +557,11 @@ class TestHBNBCommand_destroy(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -755,10 +813,11 @@ class TestHBNBCommand_all(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -889,6 +948,104 @@ class TestHBNBCommand_all(unittest.TestCase):
             self.assertIn("Review", output.getvalue().strip())
             self.assertNotIn("BaseModel", output.getvalue().strip())
 
+    def run_command(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+            return output.getvalue()
+
+    def test_all_same_output(self):
+        for _ in range(3):
+            self.run_command("create User")
+        expected = "{}\n".format(
+            [str(obj) for obj in storage.all("User").values()])
+        self.assertEqual(expected, self.run_command("all User"))
+        self.assertEqual(expected, self.run_command("User.all()"))
+        expected = "{}\n".format([str(obj) for obj in storage.all().values()])
+        self.assertEqual(expected, self.run_command("all"))
+
+    def test_all_pages(self):
+        for _ in range(5):
+            self.run_command("create City")
+        cities = storage.all("City")
+        ordered = [str(cities[key]) for key in sorted(cities)]
+        self.assertEqual("{}\n".format(ordered[:2]),
+                         self.run_command("all City limit=2"))
+        self.assertEqual("{}\n".format(ordered[2:4]),
+                         self.run_command("all City limit=2 offset=2"))
+        self.assertEqual("{}\n".format(ordered[4:6]),
+                         self.run_command("City.all(offset=4, limit=2)"))
+        self.assertEqual("{}\n".format(ordered[5:]),
+                         self.run_command("all City offset=5"))
+        everything = storage.all()
+        self.assertEqual("{}\n".format([str(everything[min(everything)])]),
+                         self.run_command("all limit=1"))
+
+    def test_all_lines(self):
+        for _ in range(3):
+            self.run_command("create State")
+        lines = self.run_command("all State format=lines").splitlines()
+        self.assertEqual(lines, [str(obj) for obj in
+                                 storage.all("State").values()])
+        lines = self.run_command("State.all(format=lines, limit=2)")
+        self.assertEqual(len(lines.splitlines()), 2)
+
+    def test_all_fields(self):
+        for _ in range(3):
+            self.run_command("create Place")
+        places = storage.all("Place")
+        for place in places.values():
+            place.name = "Place " + place.id
+        expected = "{}\n".format(["[Place] ({}) {}".format(
+            place.id, {"name": place.name, "number_rooms": 0})
+            for place in places.values()])
+        self.assertEqual(expected,
+                         self.run_command("all Place name,number_rooms"))
+        self.assertEqual(expected,
+                         self.run_command("Place.all(name, number_rooms)"))
+        lines = self.run_command("all Place name limit=2 format=lines")
+        self.assertEqual(lines.splitlines(), [
+            "[Place] ({}) {}".format(places[key].id,
+                                     {"name": places[key].name})
+            for key in sorted(places)[:2]])
+
+    def test_all_json(self):
+        for _ in range(3):
+            self.run_command("create Amenity")
+        amenities = storage.all("Amenity")
+        lines = self.run_command("all Amenity format=json").splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                         [obj.to_dict() for obj in amenities.values()])
+        lines = self.run_command(
+            "Amenity.all(name, created_at, format=json)").splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {"id": obj.id, "name": "", "__class__": "Amenity",
+             "created_at": obj.created_at.isoformat()}
+            for obj in amenities.values()])
+
+    def test_all_invalid_options(self):
+        self.assertEqual("** unknown option **\n",
+                         self.run_command("all User size=2"))
+        self.assertEqual("** invalid number **\n",
+                         self.run_command("all User limit=-1"))
+        self.assertEqual("** invalid number **\n",
+                         self.run_command("User.all(offset=two)"))
+        self.assertEqual("** unknown format **\n",
+                         self.run_command("all format=xml"))
+
+    def test_all_streams(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            def objects():
+                for i in range(3):
+                    # the objects before are printed already
+                    self.assertEqual(output.getvalue().count("'"), 2 * i)
+                    yield i
+            print_objects(objects())
+            self.assertEqual(output.getvalue(), "['0', '1', '2']\n")
+        with patch("sys.stdout", new=StringIO()) as output:
+            print_objects([])
+            print_objects([], "lines")
+            self.assertEqual(output.getvalue(), "[]\n")
+
 
 class TestHBNBCommand_update(unittest.TestCase):
     """
@@ -904,10 +1061,11 @@ class TestHBNBCommand_update(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -1562,6 +1720,21 @@ class TestHBNBCommand_update(unittest.TestCase):
         test_dict = storage.all()["Place.{}".format(testId)].__dict__
         self.assertEqual(9.8, test_dict["latitude"])
 
+    def test_update_dictionary_saves_once(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place")
+            testId = output.getvalue().strip()
+        testCmd = "Place.update({}, ".format(testId)
+        testCmd += "{'max_guest': 4, 'latitude': 9.8, 'name': 'Loft'})"
+        with patch.object(storage, "clear_dirty",
+                          wraps=storage.clear_dirty) as flush:
+            HBNBCommand().onecmd(testCmd)
+        self.assertEqual(1, flush.call_count)
+        test_dict = storage.all()["Place.{}".format(testId)].__dict__
+        self.assertEqual(4, test_dict["max_guest"])
+        self.assertEqual(9.8, test_dict["latitude"])
+        self.assertEqual("Loft", test_dict["name"])
+
 
 class TestHBNBCommand_count(unittest.TestCase):
     """
@@ -1577,10 +1750,11 @@ class TestHBNBCommand_count(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -1628,6 +1802,325 @@ class TestHBNBCommand_count(unittest.TestCase):
             self.assertFalse(HBNBCommand().onecmd("Review.count()"))
             self.assertEqual("1", output.getvalue().strip())
 
+    def test_count_after_deleting_in_place(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("count Place"))
+            before = int(output.getvalue())
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("create Place"))
+            self.assertFalse(HBNBCommand().onecmd("create Place"))
+            gone, kept = output.getvalue().split()
+        del storage.all()["Place." + gone]
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("count Place"))
+            self.assertEqual(str(before + 1), output.getvalue().strip())
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("all Place"))
+            self.assertIn(kept, output.getvalue())
+            self.assertNotIn(gone, output.getvalue())
+
+
+class TestHBNBCommand_children(unittest.TestCase):
+    """
+    Unittests for testing children method of HBNB comand interpreter.
+    """
+    @classmethod
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    @classmethod
+    def tearDown(self):
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def create(self, class_name):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("create " + class_name))
+            return output.getvalue().strip()
+
+    def children(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+            return output.getvalue().strip()
+
+    def test_children_errors(self):
+        place_id = self.create("Place")
+        self.assertEqual("** class name missing **", self.children("children"))
+        self.assertEqual("** class doesn't exist **",
+                         self.children("MyModel.children()"))
+        self.assertEqual("** instance id missing **",
+                         self.children("children Place"))
+        self.assertEqual("** child class name missing **",
+                         self.children("children Place " + place_id))
+        self.assertEqual("** class doesn't exist **",
+                         self.children("children Place {} MyModel".format(
+                             place_id)))
+        self.assertEqual("** no instance found **",
+                         self.children("children Place 1234 Review"))
+        self.assertEqual("** no relation found **",
+                         self.children("children Place {} City".format(
+                             place_id)))
+
+    def test_children_follow_updates(self):
+        place_id = self.create("Place")
+        review_id = self.create("Review")
+        command = 'Place.children("{}", Review)'.format(place_id)
+        self.assertEqual("[]", self.children(command))
+        self.children('Review.update("{}", "place_id", "{}")'.format(
+            review_id, place_id))
+        self.assertIn(review_id, self.children(command))
+        self.children("destroy Review {}".format(review_id))
+        self.assertEqual("[]", self.children(command))
+
+
+class TestHBNBCommand_where(unittest.TestCase):
+    """
+    Unittests for testing where method of HBNB comand interpreter.
+    """
+    @classmethod
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    @classmethod
+    def tearDown(self):
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def run_command(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+            return output.getvalue().strip()
+
+    def test_where_errors(self):
+        self.assertEqual("** class name missing **", self.run_command("where"))
+        self.assertEqual("** class doesn't exist **",
+                         self.run_command("MyModel.where(name, 1)"))
+        self.assertEqual("** attribute name missing **",
+                         self.run_command("where Place"))
+        self.assertEqual("** value missing **",
+                         self.run_command("where Place max_guest"))
+        self.assertEqual("** value missing **",
+                         self.run_command("where Place max_guest =="))
+        self.assertEqual("** value missing **",
+                         self.run_command("where Place max_guest in"))
+
+    def test_where_operators(self):
+        ids = [self.run_command("create Place") for _ in range(3)]
+        for place_id, guests in zip(ids, (2, 4, 6)):
+            self.run_command('Place.update("{}", "max_guest", {})'.format(
+                place_id, guests))
+        output = self.run_command('Place.where("max_guest", 4)')
+        self.assertIn(ids[1], output)
+        self.assertNotIn(ids[0], output)
+        output = self.run_command("where Place max_guest != 4")
+        self.assertIn(ids[0], output)
+        self.assertNotIn(ids[1], output)
+        output = self.run_command('Place.where("max_guest", "in", 2, 6)')
+        self.assertIn(ids[2], output)
+        self.assertNotIn(ids[1], output)
+        self.assertEqual("[]", self.run_command("where Place max_guest 5"))
+
+
+class TestHBNBCommand_near(unittest.TestCase):
+    """
+    Unittests for testing near and within methods of HBNB comand
+    interpreter.
+    """
+    @classmethod
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    @classmethod
+    def tearDown(self):
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def run_command(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+            return output.getvalue().strip()
+
+    def test_near_errors(self):
+        self.assertEqual("** class name missing **", self.run_command("near"))
+        self.assertEqual("** class doesn't exist **",
+                         self.run_command("MyModel.near(1, 2, 3)"))
+        self.assertEqual("** latitude, longitude or radius missing **",
+                         self.run_command("near Place 48.8 2.3"))
+        self.assertEqual("** invalid number **",
+                         self.run_command("near Place 48.8 east 3"))
+        self.assertEqual("** bounding box missing **",
+                         self.run_command("within Place 1 2 3"))
+        self.assertEqual("** invalid number **",
+                         self.run_command("within Place 1 2 3 north"))
+
+    def test_near_and_within(self):
+        paris = self.run_command("create Place")
+        lyon = self.run_command("create Place")
+        self.run_command('Place.update("{}", {{"latitude": 48.8566, '
+                         '"longitude": 2.3522}})'.format(paris))
+        self.run_command('Place.update("{}", {{"latitude": 45.764, '
+                         '"longitude": 4.8357}})'.format(lyon))
+        output = self.run_command("Place.near(48.86, 2.35, 500)")
+        self.assertLess(output.index(paris), output.index(lyon))
+        output = self.run_command("near Place 48.86 2.35 500 1")
+        self.assertIn(paris, output)
+        self.assertNotIn(lyon, output)
+        output = self.run_command("Place.within(45, 4, 46, 5)")
+        self.assertIn(lyon, output)
+        self.assertNotIn(paris, output)
+
+
+class TestHBNBCommand_search(unittest.TestCase):
+    """
+    Unittests for testing search method of HBNB comand interpreter.
+    """
+    @classmethod
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    @classmethod
+    def tearDown(self):
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def run_command(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+            return output.getvalue().strip()
+
+    def test_search_errors(self):
+        self.assertEqual("** class name missing **",
+                         self.run_command("search"))
+        self.assertEqual("** class doesn't exist **",
+                         self.run_command('MyModel.search("clean")'))
+        self.assertEqual("** class has no text to search **",
+                         self.run_command("search User clean"))
+        self.assertEqual("** search words missing **",
+                         self.run_command("search Review"))
+
+    def test_search(self):
+        quiet = self.run_command("create Review")
+        noisy = self.run_command("create Review")
+        self.run_command('Review.update("{}", "text", "quiet")'.format(quiet))
+        self.run_command('Review.update("{}", "text", "noisy")'.format(noisy))
+        output = self.run_command('Review.search("quiet")')
+        self.assertIn(quiet, output)
+        self.assertNotIn(noisy, output)
+        output = self.run_command("search Review quiet OR noisy")
+        self.assertIn(quiet, output)
+        self.assertIn(noisy, output)
+        self.run_command("destroy Review {}".format(quiet))
+        self.assertEqual("[]", self.run_command("search Review quiet"))
+
+
+class TestHBNBCommand_having(unittest.TestCase):
+    """
+    Unittests for testing having method of HBNB comand interpreter.
+    """
+    @classmethod
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    @classmethod
+    def tearDown(self):
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def run_command(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+            return output.getvalue().strip()
+
+    def test_having_errors(self):
+        self.assertEqual("** class name missing **",
+                         self.run_command("having"))
+        self.assertEqual("** class doesn't exist **",
+                         self.run_command('MyModel.having("amenity_ids")'))
+        self.assertEqual("** attribute name missing **",
+                         self.run_command("having Place"))
+        self.assertEqual("** value missing **",
+                         self.run_command("having Place amenity_ids"))
+
+    def test_having(self):
+        wifi = self.run_command("create Amenity")
+        pool = self.run_command("create Amenity")
+        loft = self.run_command("create Place")
+        flat = self.run_command("create Place")
+        self.run_command('update Place {} amenity_ids ["{}","{}"]'.format(
+            loft, wifi, pool))
+        self.run_command('update Place {} amenity_ids ["{}"]'.format(
+            flat, wifi))
+        output = self.run_command("having Place amenity_ids {} {}".format(
+            pool, wifi))
+        self.assertIn(loft, output)
+        self.assertNotIn(flat, output)
+        self.run_command('update Place {} amenity_ids ["{}","{}"]'.format(
+            flat, pool, wifi))
+        storage.reload()
+        output = self.run_command('Place.having("amenity_ids", "{}", "{}")'
+                                  .format(wifi, pool))
+        self.assertIn(loft, output)
+        self.assertIn(flat, output)
+        self.run_command("destroy Place {}".format(loft))
+        output = self.run_command("having Place amenity_ids {}".format(pool))
+        self.assertNotIn(loft, output)
+        self.assertIn(flat, output)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -9,7 +9,7 @@ This module contains unit tests for the BaseModel class and its methods.
 from datetime import datetime
 import unittest
 import time
-from models.base_model import BaseModel
+from models.base_model import BaseModel, parse_datetime
 
 
 class TestBaseModel(unittest.TestCase):
@@ -136,6 +136,44 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(type(test_cls.updated_at), type(date))
         self.assertEqual(test_cls.__dict__['additional_attr'], "Dummy Value")
 
+    def test_json_to_basemodel_without_microseconds(self):
+        """Test JSON to BaseModel conversion of whole-second timestamps
+
+        `isoformat()` leaves out the microseconds when they are zero, so
+        those timestamps must load too.
+        """
+        date = datetime(2024, 5, 17, 10, 30, 0)
+        test_cls = BaseModel(id="1", created_at=date.isoformat(),
+                             updated_at=date.isoformat())
+        self.assertEqual(test_cls.created_at, date)
+        self.assertEqual(test_cls.updated_at, date)
+
+    def test_timestamps_parsed_lazily(self):
+        """Test that loaded timestamps stay strings until they are read
+
+        `to_dict()` must write an unread timestamp back unchanged and
+        `__str__` must show it as a datetime.
+        """
+        raw = "2017-09-28T21:03:54.052298"
+        test_cls = BaseModel(id="1", created_at=raw, updated_at=raw)
+        self.assertEqual(test_cls.__dict__['created_at'], raw)
+        self.assertEqual(test_cls.to_dict()['created_at'], raw)
+        self.assertIsInstance(test_cls.updated_at, datetime)
+        self.assertIsInstance(test_cls.__dict__['updated_at'], datetime)
+        self.assertEqual(test_cls.to_dict()['updated_at'], raw)
+        self.assertIn("datetime.datetime(2017, 9, 28", str(test_cls))
+        self.assertIsInstance(test_cls.__dict__['created_at'], datetime)
+
+    def test_parse_datetime(self):
+        """Test parse_datetime round-trips isoformat() output"""
+        date = datetime.now()
+        self.assertEqual(parse_datetime(date.isoformat()), date)
+        self.assertEqual(
+            parse_datetime("2017-09-28T21:03:54.052298"),
+            datetime(2017, 9, 28, 21, 3, 54, 52298))
+        with self.assertRaises(ValueError):
+            parse_datetime("yesterday")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+"""
+Module: test_compact.py
+This module defines Tests for the compact model classes
+"""
+import os
+import unittest
+from datetime import datetime
+from models import storage
+from models.compact import compact_class
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+
+
+class TestCompact(unittest.TestCase):
+    """TestCompact Tests the compact variants of the model classes
+
+    Args:
+        unittest (class): TestCase unittest parent class
+    """
+    def setUp(self):
+        self.record = {
+            "id": "42", "created_at": "2024-01-02T03:04:05.000006",
+            "updated_at": "2024-01-02T03:04:05.000006",
+            "name": "Loft", "price_by_night": 120, "pool": True,
+            "__class__": "Place"}
+        self.place = compact_class(Place)(**self.record)
+
+    def test_is_model_class(self):
+        """Tests the compact class stands in for the model class"""
+        self.assertIs(compact_class(Place), type(self.place))
+        self.assertIsInstance(self.place, Place)
+        self.assertEqual(type(self.place).__name__, "Place")
+        self.assertIn("city_id", type(self.place).__slots__)
+        self.assertNotIn("near", type(self.place).__slots__)
+
+    def test_same_as_model(self):
+        """Tests to_dict and str match the model class"""
+        place = Place(**self.record)
+        self.assertEqual(self.place.to_dict(), place.to_dict())
+        self.assertEqual(str(self.place), str(place))
+        self.assertEqual(self.place.created_at,
+                         datetime(2024, 1, 2, 3, 4, 5, 6))
+
+    def test_attributes(self):
+        """Tests defaults, slots and ad-hoc attributes"""
+        self.assertEqual(self.place.city_id, "")
+        self.assertEqual(self.place.amenity_ids, [])
+        self.assertTrue(self.place.pool)
+        self.place.city_id = "c1"
+        self.place.view = "sea"
+        self.assertEqual(self.place.to_dict()["city_id"], "c1")
+        self.assertEqual(self.place.to_dict()["view"], "sea")
+        del self.place.view
+        self.assertFalse(hasattr(self.place, "view"))
+        with self.assertRaises(AttributeError):
+            self.place.missing  # pylint: disable=pointless-statement
+
+    def test_no_instance_dict(self):
+        """Tests known attributes do not create a __dict__"""
+        self.assertEqual(compact_class(User)(**{
+            "id": "1", "created_at": "2024-01-02T03:04:05",
+            "updated_at": "2024-01-02T03:04:05",
+            "email": "a@b.c", "__class__": "User"}).__dict__, {})
+
+    def test_new_instance(self):
+        """Tests new instances are stored and tracked"""
+        place = compact_class(Place)()
+        self.assertIs(storage.all()["Place." + place.id], place)
+        storage.clear_dirty(["Place." + place.id])
+        place.name = "Tracked"
+        self.assertIn(("Place." + place.id, place, {"name"}),
+                      list(storage.dirty()))
+        storage.delete(place)
+
+    def test_storage_reload(self):
+        """Tests a compact storage reads compact instances back"""
+        place = Place()
+        place.name = "Stored"
+        key = "Place." + place.id
+        saved = FileStorage._FileStorage__objects
+        try:
+            FileStorage().compact()
+            FileStorage._FileStorage__objects = {}
+            compact = FileStorage(compact=True)
+            compact.reload()
+            loaded = compact.all()[key]
+            self.assertIs(type(loaded), compact_class(Place))
+            self.assertEqual(loaded.to_dict(), place.to_dict())
+        finally:
+            FileStorage._FileStorage__objects = saved
+            for path in ("file.json", "file.json.text"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
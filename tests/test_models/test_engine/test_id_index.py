@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""
+Module: test_id_index.py
+This module defines Tests for the id index of JSON snapshots
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from models.engine.id_index import IdIndex, stamp, write_id_index
+from models.engine.serializers import JSONCodec
+
+
+class TestIdIndex(unittest.TestCase):
+    """TestIdIndex Tests building and reading an id index
+
+    Args:
+        unittest (class): TestCase unittest parent class
+    """
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data_path = os.path.join(self.tmp, "file.json")
+        self.index_path = self.data_path + ".idx"
+        self.records = {
+            "Place.{}".format(i): {"id": str(i), "name": "café " * i,
+                                   "__class__": "Place"}
+            for i in range(1000)}
+        spans = []
+        with open(self.data_path, "wb") as f:
+            JSONCodec().write(f, self.records.items(), spans)
+        with open(self.index_path, "wb") as f:
+            write_id_index(f, spans, stamp(self.data_path))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_get(self):
+        """Tests every record is found and unknown keys are not"""
+        index = IdIndex.open(self.index_path, self.data_path)
+        try:
+            for key, record in self.records.items():
+                self.assertEqual(index.get(key), record)
+            self.assertIsNone(index.get("Place.1000"))
+            self.assertIsNone(index.get("User.1"))
+        finally:
+            index.close()
+
+    def test_stale_or_missing(self):
+        """Tests an index is not opened for a changed or missing file"""
+        with open(self.data_path, "ab") as f:
+            f.write(b" ")
+        self.assertIsNone(IdIndex.open(self.index_path, self.data_path))
+        os.remove(self.index_path)
+        self.assertIsNone(IdIndex.open(self.index_path, self.data_path))
+
+    def test_empty_store(self):
+        """Tests the index of an empty snapshot finds nothing"""
+        spans = []
+        with open(self.data_path, "wb") as f:
+            JSONCodec().write(f, [], spans)
+        with open(self.index_path, "wb") as f:
+            write_id_index(f, spans, stamp(self.data_path))
+        index = IdIndex.open(self.index_path, self.data_path)
+        self.assertIsNone(index.get("Place.1"))
+        index.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,329 @@
+#!/usr/bin/python3
+"""
+Module: test_indexes.py
+This module defines Tests for the attribute indexes and model relations
+"""
+import unittest
+from models.city import City
+import io
+import random
+from models.engine.indexes import BitmapIndex, GeoIndex, HashIndex
+from models.engine.indexes import SortedIndex, TextIndex, holds_all
+from models.engine.indexes import check_operator, distance_km, foreign_keys
+from models.engine.indexes import in_box, matches, numeric_fields
+from models.engine.indexes import parse_query, radius_box, relation
+from models.engine.indexes import read_text_indexes, tokenize
+from models.engine.indexes import write_text_indexes
+from models.place import Place
+from models.review import Review
+
+
+class TestRelations(unittest.TestCase):
+    """TestRelations Tests finding the foreign keys of the models
+
+    Args:
+        unittest (class): TestCase unittest parent class
+    """
+
+    def test_foreign_keys(self):
+        """Tests the declared foreign keys are found"""
+        self.assertEqual(foreign_keys(Place), ("city_id", "user_id"))
+        self.assertEqual(foreign_keys(City), ("state_id",))
+
+    def test_numeric_fields(self):
+        """Tests the attributes declared with a number are found"""
+        self.assertEqual(numeric_fields(Place)[:4], (
+            "number_rooms", "number_bathrooms", "max_guest",
+            "price_by_night"))
+        self.assertEqual(numeric_fields(Review), ())
+
+    def test_relation(self):
+        """Tests the foreign key to a class is named after it"""
+        self.assertEqual(relation("Place", Review), "place_id")
+        with self.assertRaises(ValueError):
+            relation("Place", City)
+
+
+class TestHashIndex(unittest.TestCase):
+    """TestHashIndex Tests the attribute hash index
+
+    Args:
+        unittest (class): TestCase unittest parent class
+    """
+
+    def test_add_remove(self):
+        """Tests keys move with their values and go when removed"""
+        index = HashIndex("city_id")
+        index.add("Place.1", "a")
+        index.add("Place.2", "a")
+        self.assertEqual(index.lookup("a"), {"Place.1", "Place.2"})
+        index.add("Place.2", "b")
+        self.assertEqual(index.lookup("a"), {"Place.1"})
+        self.assertEqual(index.lookup("b"), {"Place.2"})
+        index.remove("Place.1")
+        index.remove("Place.1")
+        self.assertEqual(index.lookup("a"), set())
+        self.assertEqual(set(index.values()), {"b"})
+        self.assertEqual(len(index), 1)
+
+    def test_unhashable_values(self):
+        """Tests unhashable values are still found"""
+        index = HashIndex("amenity_ids")
+        index.add("Place.1", ["x"])
+        index.add("Place.2", [])
+        self.assertEqual(index.lookup(["x"]), {"Place.1"})
+        index.remove("Place.1")
+        self.assertEqual(index.lookup(["x"]), set())
+        self.assertEqual(len(index), 1)
+
+    def test_select(self):
+        """Tests every operator selects what matches() accepts"""
+        index = HashIndex("max_guest")
+        values = {"Place.{}".format(i): i % 3 for i in range(9)}
+        values["Place.9"] = [1]
+        for key, value in values.items():
+            index.add(key, value)
+        for op, operand in (("==", 1), ("!=", 1), ("in", [0, 2]),
+                            ("in", []), ("==", [1]), ("!=", 5)):
+            self.assertEqual(
+                index.select(op, operand),
+                {key for key, value in values.items()
+                 if matches(value, op, operand)})
+
+    def test_check_operator(self):
+        """Tests unknown operators are refused"""
+        for op in ("==", "!=", "in"):
+            check_operator(op)
+        with self.assertRaises(ValueError):
+            check_operator("<")
+
+
+class TestSortedIndex(unittest.TestCase):
+    """TestSortedIndex Tests the sorted attribute index
+
+    Args:
+        unittest (class): TestCase unittest parent class
+    """
+
+    def setUp(self):
+        self.index = SortedIndex("price_by_night")
+        self.values = {"Place.{}".format(i): (i * 37) % 11 for i in range(30)}
+        self.values.update({"Place.x": "cheap", "Place.n": float("nan"),
+                            "Place.f": 2.5})
+        self.index.update(self.values.items())
+
+    def expected(self, low=None, high=None, reverse=False):
+        """Returns the keys in range, sorted without the index"""
+        entries = sorted((value, key) for key, value in self.values.items()
+                         if isinstance(value, (int, float)) and
+                         value == value and
+                         (low is None or low <= value) and
+                         (high is None or value <= high))
+        return [key for _, key in (entries[::-1] if reverse else entries)]
+
+    def test_range(self):
+        """Tests ranges come in order with inclusive bounds"""
+        self.assertEqual(len(self.index), 31)
+        for low, high in ((None, None), (2, 5), (2.5, 2.5), (None, 0),
+                          (10, None), (6, 3), (-5, -1)):
+            for reverse in (False, True):
+                self.assertEqual(
+                    list(self.index.range(low, high, reverse)),
+                    self.expected(low, high, reverse))
+
+    def test_updates(self):
+        """Tests keys move with their values and go when removed"""
+        self.index.add("Place.0", 100)
+        self.index.add("Place.f", "unknown")
+        self.index.remove("Place.1")
+        self.index.remove("Place.1")
+        self.index.update([("Place.2", 3)])
+        self.values["Place.2"] = 3
+        self.values.update({"Place.0": 100, "Place.f": "unknown"})
+        del self.values["Place.1"]
+        self.assertEqual(list(self.index.range()), self.expected())
+        self.assertEqual(next(self.index.range(reverse=True)), "Place.0")
+
+
+class TestGeoIndex(unittest.TestCase):
+    """TestGeoIndex Tests the latitude and longitude grid index
+
+    Args:
+        unittest (class): TestCase unittest parent class
+    """
+
+    def setUp(self):
+        rand = random.Random(0)
+        self.points = {"Place.{}".format(i): (rand.uniform(-90, 90),
+                                              rand.uniform(-180, 180))
+                       for i in range(3000)}
+        self.points.update({"Place.pole": (90.0, 0.0),
+                            "Place.edge": (10.0, 180.0)})
+        self.index = GeoIndex(cell_size=1)
+        self.index.update(self.points.items())
+        self.index.update([("Place.none", ("", 0.0)),
+                           ("Place.out", (91.0, 0.0))])
+
+    def test_distance(self):
+        """Tests great-circle distances"""
+        self.assertAlmostEqual(distance_km(0, 0, 0, 1), 111.195, 3)
+        self.assertAlmostEqual(distance_km(10, 179.5, 10, -179.5),
+                               distance_km(10, 0, 10, 1))
+
+    def test_near(self):
+        """Tests near finds what a scan finds, in order"""
+        self.assertEqual(len(self.index), len(self.points))
+        for lat, lng, radius in ((0, 0, 800), (10, 179.9, 900),
+                                 (88, 40, 700), (-30, -179, 1500),
+                                 (45, 7, 5)):
+            expected = sorted(
+                (distance_km(lat, lng, *point), key)
+                for key, point in self.points.items()
+                if distance_km(lat, lng, *point) <= radius)
+            self.assertEqual(self.index.near(lat, lng, radius), expected)
+            self.assertEqual(self.index.near(lat, lng, radius, 3),
+                             expected[:3])
+
+    def test_within(self):
+        """Tests within finds what a scan finds, across the antimeridian"""
+        for box in ((-10, -20, 30, 40), (0, 170, 20, -170),
+                    radius_box(60, 179, 2000)):
+            expected = {key for key, point in self.points.items()
+                        if in_box(*point, *box)}
+            self.assertEqual({key for key, _ in self.index.within(*box)},
+                             expected)
+
+    def test_updates(self):
+        """Tests keys move with their positions and go when removed"""
+        self.index.add("Place.0", (45.0, 7.0))
+        self.index.remove("Place.1")
+        self.index.remove("Place.1")
+        self.index.add("Place.2", (None, None))
+        self.assertEqual(self.index.near(45, 7, 1), [(0.0, "Place.0")])
+        self.assertEqual(len(self.index), len(self.points) - 2)
+
+
+class TestTextIndex(unittest.TestCase):
+    """TestTextIndex Tests the inverted index of free text
+
+    Args:
+        unittest (class): TestCase unittest parent class
+    """
+
+    def setUp(self):
+        self.index = TextIndex("text")
+        self.index.update([
+            ("Review.1", "Quiet and clean, very clean."),
+            ("Review.2", "Clean, but a noisy street"),
+            ("Review.3", "Garden! garden, GARDEN"),
+            ("Review.4", None)])
+
+    def test_parse(self):
+        """Tests words and queries are split as documented"""
+        self.assertEqual(tokenize("Wi-Fi, fast & free"),
+                         ["wi", "fi", "fast", "free"])
+        self.assertEqual(parse_query("quiet AND Clean OR garden OR "),
+                         [("quiet", "clean"), ("garden",)])
+        self.assertEqual(parse_query("AND"), [])
+
+    def test_search(self):
+        """Tests AND and OR queries, ranked by word counts"""
+        self.assertEqual(self.index.search("clean"),
+                         [(2, "Review.1"), (1, "Review.2")])
+        self.assertEqual(self.index.search("clean quiet"), [(3, "Review.1")])
+        self.assertEqual(self.index.search("noisy OR garden"),
+                         [(3, "Review.3"), (1, "Review.2")])
+        self.assertEqual(self.index.search("clean OR garden", 2),
+                         [(3, "Review.3"), (2, "Review.1")])
+        self.assertEqual(self.index.search("clean AND garden"), [])
+        self.assertEqual(self.index.search(""), [])
+
+    def test_updates(self):
+        """Tests keys follow their text and go when removed"""
+        self.index.add("Review.1", ("a garden", None, 4))
+        self.index.remove("Review.2")
+        self.index.remove("Review.2")
+        self.assertEqual(self.index.search("clean"), [])
+        self.assertEqual(self.index.search("garden"),
+                         [(3, "Review.3"), (1, "Review.1")])
+        self.assertEqual(len(self.index), 3)
+
+    def test_persist(self):
+        """Tests an index is restored from the file it was written to"""
+        f = io.BytesIO()
+        write_text_indexes(f, ((1, 2), None),
+                           [("Review", ("text",), self.index.state())])
+        f.seek(0)
+        stamps, entries = read_text_indexes(f)
+        self.assertEqual(stamps, ((1, 2), None))
+        restored = TextIndex(*entries[0][1:])
+        for query in ("clean", "noisy OR garden"):
+            self.assertEqual(restored.search(query), self.index.search(query))
+        for data in (b"", b"HBNBTXT\x01", f.getvalue()[:-5]):
+            with self.assertRaises(ValueError):
+                read_text_indexes(io.BytesIO(data))
+
+
+class TestBitmapIndex(unittest.TestCase):
+    """TestBitmapIndex Tests the bitmap index of list attributes
+
+    Args:
+        unittest (class): TestCase unittest parent class
+    """
+
+    def setUp(self):
+        rand = random.Random(1)
+        self.lists = {"Place.{}".format(i): rand.sample("abcdefgh", i % 5)
+                      for i in range(300)}
+        self.lists["Place.300"] = None
+        self.lists["Place.301"] = ["a", ["unhashable"], "a"]
+        self.index = BitmapIndex("amenity_ids")
+        self.index.update(self.lists.items())
+
+    def scan(self, items):
+        """Returns what having() should return, sorted"""
+        return sorted(key for key, value in self.lists.items()
+                      if holds_all(value, items))
+
+    def test_having(self):
+        """Tests the keys holding every item are found"""
+        for items in (["a"], ["a", "b"], ["c", "d", "e"], ["a", "a"],
+                      ["z"], ["a", "z"], []):
+            self.assertEqual(sorted(self.index.having(items)),
+                             self.scan(items))
+        self.assertIn("Place.301", self.index.having(["a"]))
+        self.assertEqual(self.index.having([["unhashable"]]), [])
+        self.assertEqual(len(self.index), len(self.lists))
+
+    def test_updates(self):
+        """Tests keys follow their lists, go when removed, and new keys
+        reuse the ordinals freed"""
+        self.lists["Place.1"] = ["a", "b", "c", "d"]
+        self.index.add("Place.1", self.lists["Place.1"])
+        for key in ("Place.2", "Place.3", "Place.3"):
+            self.lists.pop(key, None)
+            self.index.remove(key)
+        self.lists["Place.new"] = ["b", "c"]
+        self.index.add("Place.new", ["b", "c"])
+        for items in (["a", "b"], ["b", "c"], ["d"], []):
+            self.assertEqual(sorted(self.index.having(items)),
+                             self.scan(items))
+        self.assertEqual(len(self.index), len(self.lists))
+        incremental = BitmapIndex("amenity_ids")
+        incremental.update(self.lists.items())
+        incremental.update([("Place.1", ["e"])])
+        self.assertIn("Place.1", incremental.having(["e"]))
+        self.assertNotIn("Place.1", incremental.having(["a"]))
+
+    def test_update_after_removing_every_key(self):
+        """Tests keys added in bulk to an emptied index are found"""
+        index = BitmapIndex("amenity_ids")
+        index.add("k1", ["x"])
+        index.remove("k1")
+        index.update([("k2", ["x"]), ("k3", ["x"])])
+        self.assertEqual(sorted(index.having(["x"])), ["k2", "k3"])
+        self.assertEqual(len(index), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
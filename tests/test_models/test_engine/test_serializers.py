@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+"""
+Module: test_serializers.py
+This module defines Tests for the snapshot codecs
+"""
+import io
+import json
+import unittest
+from models.engine.serializers import BinaryCodec, COMPRESSIONS, JSONCodec
+from models.engine.serializers import compress, compression_for
+from models.engine.serializers import get_codec, get_compression
+from models.engine.serializers import iter_json_items, iter_records
+
+
+RECORDS = {
+    "Place.{}".format(i): {
+        "id": str(i), "created_at": "2024-01-02T03:04:05.000006",
+        "name": "Loft \"{}\"".format(i), "price_by_night": i,
+        "latitude": i / 7, "amenity_ids": ["a", "b"][:i % 3],
+        "description": None, "__class__": "Place"}
+    for i in range(10)}
+
+
+def written(codec, records, compression=None):
+    """Returns a reader over the records written with a codec"""
+    f = io.BytesIO()
+    out = compress(f, compression)
+    codec.write(out, records.items())
+    if out is not f:
+        out.close()
+    return io.BufferedReader(io.BytesIO(f.getvalue()))
+
+
+class TestCodecs(unittest.TestCase):
+    """TestCodecs Tests writing and reading snapshots
+
+    Args:
+        unittest (class): TestCase unittest parent class
+    """
+
+    def test_round_trip(self):
+        """Tests every codec reads back what it wrote, in order"""
+        for codec in (JSONCodec(), BinaryCodec()):
+            items = list(iter_records(written(codec, RECORDS)))
+            self.assertEqual(items, list(RECORDS.items()))
+            self.assertEqual(list(iter_records(written(codec, {}))), [])
+
+    def test_json_codec_writes_json(self):
+        """Tests the json codec writes what json.dumps writes"""
+        f = written(JSONCodec(), RECORDS)
+        self.assertEqual(f.read().decode("utf-8"), json.dumps(RECORDS))
+
+    def test_binary_is_smaller(self):
+        """Tests the binary codec writes fewer bytes than JSON"""
+        binary = written(BinaryCodec(), RECORDS).read()
+        self.assertTrue(binary.startswith(BinaryCodec.magic))
+        self.assertLess(len(binary), len(json.dumps(RECORDS)))
+
+    def test_truncated_binary(self):
+        """Tests a binary snapshot cut short raises ValueError"""
+        data = written(BinaryCodec(), RECORDS).read()
+        with self.assertRaises(ValueError):
+            list(iter_records(io.BufferedReader(io.BytesIO(data[:-3]))))
+
+    def test_get_codec(self):
+        """Tests codecs are found by name"""
+        self.assertEqual(get_codec("binary").name, "binary")
+        with self.assertRaises(ValueError):
+            get_codec("xml")
+
+
+class TestCompression(unittest.TestCase):
+    """TestCompression Tests compressed snapshots
+
+    Args:
+        unittest (class): TestCase unittest parent class
+    """
+
+    def test_round_trip(self):
+        """Tests every compression is detected and read back"""
+        for name, (magic, _) in COMPRESSIONS.items():
+            for codec in (JSONCodec(), BinaryCodec()):
+                f = written(codec, RECORDS, name)
+                self.assertTrue(f.peek(16).startswith(magic))
+                self.assertEqual(list(iter_records(f)),
+                                 list(RECORDS.items()))
+
+    def test_compresses(self):
+        """Tests compressed snapshots are smaller"""
+        plain = len(written(JSONCodec(), RECORDS).read())
+        for name in COMPRESSIONS:
+            self.assertLess(len(written(JSONCodec(), RECORDS, name).read()),
+                            plain)
+
+    def test_truncated(self):
+        """Tests a compressed snapshot cut short raises ValueError"""
+        for name in COMPRESSIONS:
+            data = written(JSONCodec(), RECORDS, name).read()
+            with self.assertRaises(ValueError):
+                list(iter_records(io.BufferedReader(
+                    io.BytesIO(data[:len(data) // 2]))))
+
+    def test_names(self):
+        """Tests compressions are found by name and extension"""
+        self.assertEqual(compression_for("file.json.gz"), "gzip")
+        self.assertEqual(compression_for("file.json.xz"), "lzma")
+        self.assertIsNone(compression_for("file.json"))
+        self.assertIsNone(get_compression("none"))
+        with self.assertRaises(ValueError):
+            get_compression("zip")
+
+
+class TestIterJsonItems(unittest.TestCase):
+    """
+    A class to test the streaming JSON object reader.
+    """
+
+    def test_matches_json_loads(self):
+        """
+        Test that every chunk size yields the same members as json.loads.
+        """
+        data = {
+            "BaseModel.{}".format(i): {
+                "id": str(i), "price": i / 7, "big": 10 ** i,
+                "flag": bool(i % 2), "none": None,
+                "text": "}{\",:" * i, "list": [i, {"nested": "]"}]}
+            for i in range(20)}
+        for text in (json.dumps(data), json.dumps(data, indent=4)):
+            for chunk_size in (1, 2, 5, 64, 1 << 16):
+                items = iter_json_items(io.StringIO(text), chunk_size)
+                self.assertEqual(dict(items), data)
+
+    def test_empty_object(self):
+        """
+        Test that an empty object yields nothing.
+        """
+        self.assertEqual(list(iter_json_items(io.StringIO(" {\n} "))), [])
+
+    def test_invalid_documents(self):
+        """
+        Test that malformed or truncated documents raise JSONDecodeError.
+        """
+        for text in ("", "[]", '{"a" 1}', '{"a": 1', '{"a": 1,}',
+                     '{"a": 2.x}'):
+            with self.assertRaises(json.decoder.JSONDecodeError):
+                list(iter_json_items(io.StringIO(text), 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,271 @@
+#!/usr/bin/python3
+"""
+Module: test_sqlite_storage.py
+This module defines Tests for the SQLiteStorage engine
+"""
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from models.engine.sqlite_storage import SQLiteStorage
+from models.place import Place
+from models.user import User
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    """TestSQLiteStorage Tests the SQLiteStorage engine
+
+    Args:
+        unittest (class): TestCase unittest parent class
+    """
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "file.db")
+        self.storage = SQLiteStorage(self.db_path)
+        self.storage.reload()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def reopened(self):
+        """Returns a new storage on the same database"""
+        storage = SQLiteStorage(self.db_path)
+        storage.reload()
+        return storage
+
+    def rows(self):
+        """Returns the number of rows in the database"""
+        with sqlite3.connect(self.db_path) as db:
+            return db.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+
+    def test_has_storage_methods(self):
+        """Tests the engine offers the FileStorage interface"""
+        for name in ("all", "get", "count", "new", "delete", "save",
+                     "reload", "mark_dirty", "dirty", "clear_dirty",
+                     "transaction"):
+            self.assertTrue(hasattr(SQLiteStorage, name))
+
+    def test_save_and_reload(self):
+        """Tests objects survive a save and a reopened database"""
+        place = Place()
+        place.name = "Loft"
+        self.storage.new(place)
+        user = User()
+        self.storage.new(user)
+        self.storage.save()
+        storage = self.reopened()
+        loaded = storage.get(Place, place.id)
+        self.assertIsInstance(loaded, Place)
+        self.assertEqual(loaded.name, "Loft")
+        self.assertEqual(loaded.created_at, place.created_at)
+        self.assertEqual(storage.count(), 2)
+        self.assertEqual(storage.count("User"), 1)
+        self.assertEqual(list(storage.all(User)), ["User." + user.id])
+        self.assertEqual(len(storage.all()), 2)
+
+    def test_delete_in_place(self):
+        """Tests a key removed from all() is deleted by the next save"""
+        kept, gone = Place(), Place()
+        for place in (kept, gone):
+            self.storage.new(place)
+        self.storage.save()
+        del self.storage.all()["Place." + gone.id]
+        self.assertEqual(self.storage.count(Place), 1)
+        self.storage.save()
+        self.assertEqual(self.rows(), 1)
+        self.assertEqual(list(self.reopened().all(Place)),
+                         ["Place." + kept.id])
+
+    def test_reads_lazily(self):
+        """Tests reload reads no row and get reads only one"""
+        places = [Place() for _ in range(3)]
+        for place in places:
+            self.storage.new(place)
+        self.storage.save()
+        storage = self.reopened()
+        self.assertEqual(storage.count(Place), 3)
+        storage.get("Place", places[0].id)
+        self.assertEqual(len(storage._SQLiteStorage__objects), 1)
+        self.assertIsNone(storage.get("Place", "missing"))
+
+    def test_save_writes_changed_rows_only(self):
+        """Tests save only writes the objects marked dirty"""
+        place = Place()
+        self.storage.new(place)
+        self.storage.save()
+        self.assertEqual(list(self.storage.dirty()), [])
+        with sqlite3.connect(self.db_path) as db:
+            db.execute("UPDATE objects SET data = ?",
+                       (json.dumps(dict(place.to_dict(), name="Db")),))
+        self.storage.save()
+        self.assertEqual(self.reopened().get(Place, place.id).name, "Db")
+        place.name = "Memory"
+        self.storage.mark_dirty(place, "name")
+        self.storage.save()
+        self.assertEqual(self.reopened().get(Place, place.id).name,
+                         "Memory")
+
+    def test_delete(self):
+        """Tests deleted objects are gone before and after a save"""
+        place = Place()
+        self.storage.new(place)
+        self.storage.save()
+        storage = self.reopened()
+        storage.delete(storage.get(Place, place.id))
+        self.assertIsNone(storage.get(Place, place.id))
+        self.assertEqual(storage.count(Place), 0)
+        self.assertEqual(storage.all(Place), {})
+        storage.save()
+        self.assertEqual(self.rows(), 0)
+
+    def test_transaction_defers_save(self):
+        """Tests saves inside a transaction are written once at the end"""
+        with self.storage.transaction():
+            self.storage.new(Place())
+            self.storage.save()
+            self.assertEqual(self.rows(), 0)
+        self.assertEqual(self.rows(), 1)
+
+    def test_children(self):
+        """Tests children reads the referring rows and unsaved changes"""
+        from models.review import Review  # noqa  # pylint: disable=import-outside-toplevel
+        place = Place()
+        review = Review()
+        review.place_id = place.id
+        for obj in (place, review, Review()):
+            self.storage.new(obj)
+        self.storage.save()
+        storage = self.reopened()
+        self.assertEqual(list(storage.children(Place, place.id, Review)),
+                         ["Review." + review.id])
+        storage.get(Review, review.id).place_id = "elsewhere"
+        storage.mark_dirty(storage.get(Review, review.id), "place_id")
+        self.assertEqual(storage.children("Place", place.id, "Review"), {})
+        with self.assertRaises(ValueError):
+            storage.children(Review, review.id, Place)
+
+    def test_where(self):
+        """Tests where reads the matching rows through a declared index"""
+        places = [Place() for _ in range(3)]
+        for place, guests in zip(places, (2, 4, 6)):
+            place.max_guest = guests
+            self.storage.new(place)
+        self.storage.save()
+        storage = self.reopened()
+        storage.add_index(Place, "max_guest")
+        plan = sqlite3.connect(self.db_path).execute(
+            "EXPLAIN QUERY PLAN SELECT key FROM objects WHERE class = ? "
+            "AND json_extract(data, '$.max_guest') IN (?)",
+            ("Place", 4)).fetchall()
+        self.assertIn("objects_max_guest", str(plan))
+        self.assertEqual(list(storage.where(Place, "max_guest", 4)),
+                         ["Place." + places[1].id])
+        self.assertEqual(len(storage._SQLiteStorage__objects), 1)
+        self.assertEqual(len(storage.where("Place", "max_guest", [2, 6],
+                                           "in")), 2)
+        self.assertEqual(len(storage.where(Place, "max_guest", 4, "!=")), 2)
+        self.assertEqual(storage.where(Place, "city_id", ""),
+                         storage.all(Place))
+        with self.assertRaises(ValueError):
+            storage.add_index(Place, "max_guest') --")
+
+    def test_order_by(self):
+        """Tests order_by reads ranges in order, with unsaved changes"""
+        places = [Place() for _ in range(4)]
+        for place, price in zip(places, (80, 120, 60, 200)):
+            place.price_by_night = price
+            self.storage.new(place)
+        self.storage.new(Place())
+        self.storage.save()
+        storage = self.reopened()
+        plan = sqlite3.connect(self.db_path).execute(
+            "EXPLAIN QUERY PLAN SELECT key FROM objects WHERE class = ? "
+            "AND json_extract(data, '$.price_by_night') >= ? "
+            "ORDER BY json_extract(data, '$.price_by_night')",
+            ("Place", 70)).fetchall()
+        self.assertIn("objects_price_by_night", str(plan))
+        keys = ["Place." + place.id for place in places]
+        self.assertEqual(list(storage.order_by(Place, "price_by_night",
+                                               70, 150)), keys[:2])
+        self.assertEqual(len(storage._SQLiteStorage__objects), 2)
+        self.assertEqual(list(storage.order_by(
+            "Place", "price_by_night", 1, limit=1, reverse=True)), keys[3:])
+        self.assertEqual(len(storage.order_by(Place, "price_by_night")), 5)
+        storage.get(Place, places[3].id).price_by_night = 10
+        storage.mark_dirty(storage.get(Place, places[3].id))
+        self.assertEqual(list(storage.order_by(Place, "price_by_night", 1,
+                                               limit=2)),
+                         [keys[3], keys[2]])
+
+    def test_near(self):
+        """Tests near and within read the rows in the box"""
+        paris, versailles, lyon = Place(), Place(), Place()
+        paris.latitude, paris.longitude = 48.8566, 2.3522
+        versailles.latitude, versailles.longitude = 48.8049, 2.1204
+        lyon.latitude, lyon.longitude = 45.764, 4.8357
+        for obj in (paris, versailles, lyon, Place()):
+            self.storage.new(obj)
+        self.storage.save()
+        storage = self.reopened()
+        self.assertEqual(list(storage.near(Place, 48.86, 2.35, 20)),
+                         ["Place." + paris.id, "Place." + versailles.id])
+        self.assertEqual(len(storage._SQLiteStorage__objects), 2)
+        self.assertEqual(list(storage.within("Place", 45, 4, 46, 5)),
+                         ["Place." + lyon.id])
+        self.assertEqual(storage.within(Place, -1, -1, 1, 1), {})
+        self.assertEqual(len(storage._SQLiteStorage__objects), 3)
+
+    def test_having(self):
+        """Tests having only reads the rows holding every value"""
+        loft, flat, hut = Place(), Place(), Place()
+        loft.amenity_ids = ["wifi", "pool"]
+        flat.amenity_ids = ["wifi"]
+        hut.name = "wifi"
+        for obj in (loft, flat, hut):
+            self.storage.new(obj)
+        self.storage.save()
+        storage = self.reopened()
+        self.assertEqual(list(storage.having(Place, "amenity_ids",
+                                             ["pool", "wifi"])),
+                         ["Place." + loft.id])
+        self.assertEqual(len(storage._SQLiteStorage__objects), 1)
+        self.assertEqual(len(storage.having("Place", "amenity_ids",
+                                            ["wifi"])), 2)
+        self.assertEqual(len(storage.having(Place, "amenity_ids", [])), 3)
+        storage.get(Place, flat.id).amenity_ids = ["pool", "wifi"]
+        self.assertEqual(len(storage.having(Place, "amenity_ids",
+                                            ["pool", "wifi"])), 2)
+        with self.assertRaises(ValueError):
+            self.reopened().having(Place, "amenity_ids) --", ["wifi"])
+
+    def test_search(self):
+        """Tests search ranks the rows of a class by the words they hold"""
+        from models.review import Review  # noqa  # pylint: disable=import-outside-toplevel
+        quiet, noisy = Review(), Review()
+        quiet.text = "Quiet and clean, very clean"
+        noisy.text = "Clean but noisy"
+        for obj in (quiet, noisy, Place()):
+            self.storage.new(obj)
+        self.storage.save()
+        storage = self.reopened()
+        self.assertEqual(list(storage.search(Review, ("text",), "clean")),
+                         ["Review." + quiet.id, "Review." + noisy.id])
+        self.assertEqual(list(storage.search("Review", ["text"],
+                                             "quiet OR clean", 1)),
+                         ["Review." + quiet.id])
+
+    def test_migrate(self):
+        """Tests a FileStorage JSON file is copied into the database"""
+        place = Place()
+        place.name = "Loft"
+        json_path = os.path.join(self.tmp, "file.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"Place." + place.id: place.to_dict()}, f)
+        self.assertEqual(self.storage.migrate(json_path), 1)
+        self.assertEqual(self.reopened().get(Place, place.id).name, "Loft")
+
+
+if __name__ == '__main__':
+    unittest.main()
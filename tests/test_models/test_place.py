@@ -5,6 +5,7 @@ This module defines Tests for the Place model
 """
 import unittest
 import time
+from models.amenity import Amenity
 from models.place import Place
 
 
@@ -51,6 +52,31 @@ class TestPlace(unittest.TestCase):
         self.assertTrue(hasattr(self.place, 'created_at'))
         self.assertTrue(hasattr(self.place, 'updated_at'))
 
+    def test_near_and_within(self):
+        """Tests the position queries find the stored places"""
+        self.place.latitude = 48.8566
+        self.place.longitude = 2.3522
+        other = Place()
+        other.latitude = 48.8049
+        other.longitude = 2.1204
+        near = Place.near(48.86, 2.35, 20)
+        self.assertLess(near.index(self.place), near.index(other))
+        self.assertEqual(len(Place.near(48.86, 2.35, 20, 1)), 1)
+        self.assertNotIn(other, Place.near(48.86, 2.35, 5))
+        self.assertIn(other, Place.within(48.8, 2.1, 48.81, 2.2))
+        self.assertNotIn(self.place, Place.within(48.8, 2.1, 48.81, 2.2))
+
+    def test_with_amenities(self):
+        """Tests the places having some amenities are found"""
+        wifi, pool = Amenity(), Amenity()
+        self.place.amenity_ids = [wifi.id, pool.id]
+        other = Place()
+        other.amenity_ids = [wifi.id]
+        self.assertEqual(Place.with_amenities(wifi, pool.id), [self.place])
+        self.assertIn(other, Place.with_amenities(wifi))
+        other.amenity_ids = [pool.id, wifi.id]
+        self.assertIn(other, Place.with_amenities(pool, wifi))
+
     def test_str_representation(self):
         """Tests the __str__ method"""
         expected_str = "[Place] ({}) {}".format(
@@ -12,6 +12,7 @@ Attributes:
 import unittest
 import time
 from models.review import Review
+from models.engine.file_storage import FileStorage
 
 
 class TestReview(unittest.TestCase):
@@ -48,6 +49,22 @@ class TestReview(unittest.TestCase):
         self.assertTrue(hasattr(self.review, 'created_at'))
         self.assertTrue(hasattr(self.review, 'updated_at'))
 
+    def test_search(self):
+        """Test search finds the stored reviews by the words of their text"""
+        self.review.text = "Quiet street, clean and CLEAN again"
+        other = Review()
+        other.text = "clean but noisy"
+        try:
+            found = Review.search("clean")
+            self.assertLess(found.index(self.review), found.index(other))
+            self.assertIn(self.review, Review.search("quiet AND clean"))
+            self.assertNotIn(other, Review.search("quiet clean"))
+            self.assertIn(other, Review.search("quiet OR noisy"))
+            self.assertEqual(len(Review.search("clean", 1)), 1)
+        finally:
+            # a text index left built is written by every later save
+            FileStorage._FileStorage__attr_indexes = {}
+
     def test_str_representation(self):
         """Test string representation of Review instance"""
         expected_str = "[Review] ({}) {}".format(